@@ -6,7 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from src.database.base import Base
-from src.user_profile.models import UserProfile,Question,QuestionOption,UserAnswer
+from src.user_profile.models import UserProfile,Question,QuestionOption,UserAnswer,AnswerAggregate
 from src.config.config import settings
 
 
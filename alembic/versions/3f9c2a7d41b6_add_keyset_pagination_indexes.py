@@ -0,0 +1,30 @@
+"""add keyset pagination indexes
+
+Revision ID: 3f9c2a7d41b6
+Revises: 78db5789a0bb
+Create Date: 2026-10-18 09:12:04.318227
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d41b6'
+down_revision: Union[str, Sequence[str], None] = '78db5789a0bb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_profile_created_at_id', 'users_profile', ['created_at', 'id'], unique=False)
+    op.create_index('ix_questions_created_at_id', 'questions', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_questions_created_at_id', table_name='questions')
+    op.drop_index('ix_users_profile_created_at_id', table_name='users_profile')
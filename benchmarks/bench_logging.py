@@ -0,0 +1,88 @@
+"""
+Per-request logging overhead inside the event loop.
+
+Each simulated request logs what a typical endpoint does (two controller and
+two service lines). Modes, each in a fresh interpreter writing to a temp dir:
+
+    legacy  handlers on all four loggers (the old setup_logger() layout;
+            child records are written twice)
+    direct  handlers on `fastapi_app` only, written synchronously
+    queue   handlers on a QueueListener thread behind a bounded queue
+    json    queue, writing JSON lines (LOG_FORMAT=json)
+
+    python -m benchmarks.bench_logging --requests 20000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+
+from src.config.config import PROJECT_ROOT
+
+
+CHILD = r"""
+import asyncio, json, logging, os, sys, time
+mode, requests, log_dir = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+os.environ["LOG_QUEUE_ENABLED"] = "true" if mode in ("queue", "json") else "false"
+os.environ["LOG_FORMAT"] = "json" if mode == "json" else "text"
+from src.utils import logger as logs
+
+if mode == "legacy":
+    for name, level in (("fastapi_app", logging.INFO), ("fastapi_app.database", logging.DEBUG),
+                        ("fastapi_app.service", logging.INFO), ("fastapi_app.controller", logging.INFO)):
+        logs.setup_logger(name, level, log_dir)
+else:
+    logs.configure_logging(log_dir=log_dir)
+# Console output would dominate every mode equally
+for handler in logs.logger.handlers + list(getattr(logs._pipeline, "handlers", [])):
+    if type(handler) is logging.StreamHandler:
+        handler.setStream(open(os.devnull, "w"))
+for name in ("fastapi_app.service", "fastapi_app.controller"):
+    for handler in logging.getLogger(name).handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setStream(open(os.devnull, "w"))
+
+async def handle(i):
+    logs.controller_logger.info(f"Listing users page (limit={i})")
+    logs.service_logger.info(f"Listing users page (limit={i})")
+    logs.service_logger.info(f"Total users found: {i}")
+    logs.controller_logger.info(f"Users in page: {i}")
+
+async def main():
+    started = time.perf_counter()
+    for i in range(requests):
+        await handle(i)
+    elapsed = time.perf_counter() - started
+    dropped = logs.dropped_records()
+    logs.shutdown_logging()
+    print(json.dumps({"per_request_us": elapsed / requests * 1e6, "dropped": dropped}))
+
+asyncio.run(main())
+"""
+
+
+def run(mode: str, requests: int) -> dict:
+    with tempfile.TemporaryDirectory() as log_dir:
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, mode, str(requests), log_dir],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--modes", nargs="+", default=["legacy", "direct", "queue", "json"])
+    args = parser.parse_args()
+
+    print(f"{args.requests} simulated requests, 4 log lines each")
+    for mode in args.modes:
+        result = run(mode, args.requests)
+        print(f"  {mode:<7} {result['per_request_us']:8.1f} us/request  dropped {result['dropped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compare the two ways of building the `/question/list` payload.
+
+    orm       SELECT questions + selectin options, ORM hydration, Pydantic encode
+    database  one SELECT where Postgres assembles the JSON with json_agg
+
+Run against a scratch database (DB_* settings), seeding it first:
+
+    DB_DATABASE=bench_db python -m benchmarks.bench_question_catalog --seed
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+
+from src.database.base import Base
+from src.database.postgres_conn import dispose_database, get_database
+from src.user_profile.models import Question
+from src.user_profile.repository import QuestionRepository
+from src.user_profile.schemas import QuestionRead
+
+
+_catalog_adapter = TypeAdapter(List[QuestionRead])
+
+
+async def seed(questions: int, options: int) -> None:
+    async with get_database().engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with get_database().session_maker() as session:
+        async with session.begin():
+            existing = (await session.execute(select(func.count()).select_from(Question))).scalar_one()
+            repo = QuestionRepository(session)
+            for start in range(existing, questions, 1000):
+                count = min(1000, questions - start)
+                await repo.add_many_with_options(
+                    [
+                        {"text": f"Question {start + i}", "type": "single_choice", "que_order": start + i}
+                        for i in range(count)
+                    ],
+                    [[f"Option {n}" for n in range(options)] for _ in range(count)]
+                )
+
+
+async def build_orm() -> bytes:
+    async with get_database().session_maker() as session:
+        async with session.begin():
+            rows = await QuestionRepository(session).list_by()
+            return _catalog_adapter.dump_json(_catalog_adapter.validate_python(rows, from_attributes=True))
+
+
+async def build_database() -> bytes:
+    async with get_database().session_maker() as session:
+        async with session.begin():
+            return await QuestionRepository(session).catalog_json()
+
+
+async def measure(name: str, build: Callable[[], Awaitable[bytes]], repeat: int) -> None:
+    await build()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = await build()
+        timings.append(time.perf_counter() - started)
+    print(
+        f"{name:<9} median {statistics.median(timings) * 1000:8.1f} ms  "
+        f"min {min(timings) * 1000:8.1f} ms  payload {len(payload) / 1024:8.0f} KiB"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.seed:
+        await seed(args.questions, args.options)
+    await measure("orm", build_orm, args.repeat)
+    await measure("database", build_database, args.repeat)
+    await dispose_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="Insert questions until the table holds --questions rows")
+    parser.add_argument("--questions", type=int, default=10_000)
+    parser.add_argument("--options", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
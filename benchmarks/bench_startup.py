@@ -0,0 +1,79 @@
+"""
+Measure cold start: importing `src.main`, running the lifespan startup and
+serving the first request, each in a fresh interpreter (like a worker respawn).
+
+    python -m benchmarks.bench_startup --runs 10
+    DB_POOL_WARMUP_CONNECTIONS=5 python -m benchmarks.bench_startup --path /api/v1/user/list/page
+
+The default path needs no database; pass a database-backed one to include
+connecting (or to see what warm-up saves).
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from src.config.config import PROJECT_ROOT
+
+
+CHILD = r"""
+import asyncio, json, sys, time
+import httpx
+
+async def main(path):
+    started = time.perf_counter()
+    from src.main import app
+    imported = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            method = "GET" if path.endswith((".json", "/docs")) else "POST"
+            response = await client.request(method, path)
+        served = time.perf_counter()
+    print(json.dumps({
+        "status": response.status_code,
+        "import": imported - started,
+        "startup": ready - imported,
+        "first_request": served - ready,
+        "total": served - started,
+    }))
+
+asyncio.run(main(sys.argv[1]))
+"""
+
+PHASES = ("import", "startup", "first_request", "total")
+
+
+def run_once(path: str) -> dict:
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, path],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - started
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/api/v1/openapi.json")
+    args = parser.parse_args()
+
+    results = [run_once(args.path) for _ in range(args.runs)]
+    print(f"{args.runs} runs of {args.path} (status {results[-1]['status']}), median / max in ms")
+    for phase in PHASES + ("process",):
+        timings = [result[phase] * 1000 for result in results]
+        print(f"  {phase:<14} {statistics.median(timings):8.1f} {max(timings):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Throughput of the production server (`python -m src.server`) by worker count.
+
+Each worker count gets a fresh server; load comes from several client
+processes with keep-alive connections, so the client is less likely to be
+the bottleneck. Pass a database-backed path to include query time.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --duration 10
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from src.config.config import PROJECT_ROOT
+
+
+def _client_process(url: str, method: str, concurrency: int, duration: float, results) -> None:
+    async def run() -> int:
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+            async def loop() -> int:
+                done = 0
+                while time.perf_counter() < deadline:
+                    response = await client.request(method, url)
+                    done += response.status_code < 500
+                return done
+            return sum(await asyncio.gather(*(loop() for _ in range(concurrency))))
+
+    results.put(asyncio.run(run()))
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start within {timeout}s")
+
+
+def measure(workers: int, args: argparse.Namespace) -> float:
+    env = dict(os.environ, SERVER_WORKERS=str(workers), SERVER_PORT=str(args.port), SERVER_HOST="127.0.0.1")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.server"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_until_ready(f"{base_url}/api/v1/openapi.json")
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=_client_process,
+                args=(base_url + args.path, args.method, args.concurrency, args.duration, results)
+            )
+            for _ in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        total = sum(results.get() for _ in clients)
+        for client in clients:
+            client.join()
+        return total / args.duration
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/api/v1/openapi.json")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--clients", type=int, default=4, help="Client processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Connections per client process")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    print(f"{args.method} {args.path}, {args.clients}x{args.concurrency} connections, {args.duration}s each ({os.cpu_count()} CPUs)")
+    baseline = None
+    for workers in args.workers:
+        rate = measure(workers, args)
+        baseline = baseline or rate
+        print(f"  {workers:>3} workers  {rate:10.1f} req/s  x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
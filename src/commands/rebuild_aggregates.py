@@ -0,0 +1,65 @@
+"""
+Recompute `answer_aggregates` from `user_answers`.
+
+Usage: python -m src.commands.rebuild_aggregates [--batch-size N]
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.postgres_conn import dispose_database, get_database
+from src.user_profile.aggregation import count_answers
+from src.user_profile.models import Question, UserAnswer
+from src.user_profile.repository import AnswerAggregateRepository
+from src.user_profile.schemas import QuestionType
+from src.utils.logger import configure_logging, service_logger
+
+
+async def rebuild_aggregates(session: AsyncSession, batch_size: int = 10000) -> int:
+    """
+    Recompute every aggregate and return the number of buckets written.
+
+    Answers are streamed in batches and tallied with `count_answers`, like
+    ingestion does. Concurrent ingestion blocks on the table lock until the
+    rebuild commits, so no increment is lost or doubled.
+    Must be called inside a transaction.
+    """
+    await session.execute(text("LOCK TABLE answer_aggregates IN SHARE ROW EXCLUSIVE MODE"))
+    question_types: Dict[int, QuestionType] = {
+        question_id: QuestionType(question_type.value)
+        for question_id, question_type in (await session.execute(select(Question.id, Question.type))).all()
+    }
+
+    totals: Counter = Counter()
+    stmt = select(UserAnswer.question_id, UserAnswer.answer_data).execution_options(yield_per=batch_size)
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        totals.update(count_answers(
+            (question_id, question_types[question_id], answer_data)
+            for question_id, answer_data in partition
+            if question_id in question_types
+        ))
+
+    await AnswerAggregateRepository(session).replace_all(totals)
+    service_logger.info("Rebuilt answer aggregates: %s buckets", len(totals))
+    return len(totals)
+
+
+async def main(batch_size: int) -> None:
+    configure_logging()
+    async with get_database().session_maker() as session:
+        async with session.begin():
+            await rebuild_aggregates(session, batch_size=batch_size)
+    await dispose_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute answer aggregates from user_answers.")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
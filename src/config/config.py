@@ -1,4 +1,7 @@
+import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Literal, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field, ConfigDict
 
@@ -14,6 +17,22 @@ class DatabaseSettings(BaseSettings):
     password: str = Field(default="postgres")
     database: str = Field(default="devdatabase")
     driver: str = Field(default="asyncpg")
+    pool_size: int = Field(default=5)
+    max_overflow: int = Field(default=10)
+    pool_timeout: float = Field(default=30.0)
+    # Seconds after which a connection is replaced on checkout; -1 disables
+    pool_recycle: int = Field(default=1800)
+    pool_pre_ping: bool = Field(default=False)
+    # asyncpg prepared statement cache per connection; 0 behind PgBouncer in transaction mode
+    statement_cache_size: int = Field(default=100)
+    # Optional full SQLAlchemy URL of a read replica for read-only sessions
+    replica_url: Optional[str] = Field(default=None)
+    replica_max_lag_seconds: float = Field(default=5.0)
+    replica_check_interval_seconds: float = Field(default=5.0)
+    # A probe that takes longer counts as the replica being unavailable
+    replica_probe_timeout_seconds: float = Field(default=2.0)
+    # Connections opened at startup so the first requests don't pay for connecting
+    pool_warmup_connections: int = Field(default=0)
 
     model_config = ConfigDict(
         env_prefix="DB_",
@@ -30,12 +49,136 @@ class DatabaseSettings(BaseSettings):
         )
 
 
+class CacheSettings(BaseSettings):
+    enabled: bool = Field(default=False)
+    maxsize: int = Field(default=1024)
+    ttl_seconds: float = Field(default=60.0)
+    catalog_ttl_seconds: float = Field(default=30.0)
+
+    model_config = ConfigDict(
+        env_prefix="CACHE_",
+        env_file=ENV_PATH,
+        case_sensitive=False,
+        extra="ignore"
+    )
+
+
+class AnswerBufferSettings(BaseSettings):
+    enabled: bool = Field(default=False)
+    max_batch_rows: int = Field(default=5000)
+    flush_interval_ms: int = Field(default=50)
+    max_queue_depth: int = Field(default=10000)
+    # "block" waits up to enqueue_timeout_seconds for room, "reject" fails immediately
+    backpressure: Literal["block", "reject"] = Field(default="block")
+    enqueue_timeout_seconds: float = Field(default=1.0)
+
+    model_config = ConfigDict(
+        env_prefix="ANSWER_BUFFER_",
+        env_file=ENV_PATH,
+        case_sensitive=False,
+        extra="ignore"
+    )
+
+
+class ResultsSettings(BaseSettings):
+    # Share live result deltas between workers with Postgres LISTEN/NOTIFY
+    # (needs a session-level connection: not through PgBouncer in transaction mode)
+    fan_out: bool = Field(default=True)
+
+    model_config = ConfigDict(
+        env_prefix="RESULTS_",
+        env_file=ENV_PATH,
+        case_sensitive=False,
+        extra="ignore"
+    )
+
+
+class CatalogSettings(BaseSettings):
+    # Where /question/list gets its JSON: "orm" validates ORM rows with Pydantic,
+    # "database" has Postgres assemble the array with json_agg
+    list_source: Literal["orm", "database"] = Field(default="orm")
+
+    model_config = ConfigDict(
+        env_prefix="CATALOG_",
+        env_file=ENV_PATH,
+        case_sensitive=False,
+        extra="ignore"
+    )
+
+
+class ServerSettings(BaseSettings):
+    host: str = Field(default="0.0.0.0")
+    port: int = Field(default=8000)
+    # 0 means one worker per CPU
+    workers: int = Field(default=0)
+    # "auto" uses gunicorn (prefork, preloaded app) when installed, uvicorn's supervisor otherwise
+    manager: Literal["auto", "gunicorn", "uvicorn"] = Field(default="auto")
+    # "auto" picks uvloop / httptools when they are installed
+    loop: Literal["auto", "asyncio", "uvloop"] = Field(default="auto")
+    http: Literal["auto", "h11", "httptools"] = Field(default="auto")
+    preload_app: bool = Field(default=True)
+    # Restart a worker after this many requests (0 disables); jitter spreads the restarts
+    max_requests: int = Field(default=10000)
+    max_requests_jitter: int = Field(default=1000)
+    keep_alive_seconds: int = Field(default=5)
+    backlog: int = Field(default=2048)
+    graceful_timeout_seconds: int = Field(default=30)
+    # Send per-request db/handler/serialize durations in a Server-Timing header
+    timing_header: bool = Field(default=True)
+    # Sum the /metrics of all workers through files in this directory (emptied at start)
+    metrics_multiproc_dir: Optional[str] = Field(default=None)
+
+    model_config = ConfigDict(
+        env_prefix="SERVER_",
+        env_file=ENV_PATH,
+        case_sensitive=False,
+        extra="ignore"
+    )
+
+    @property
+    def worker_count(self) -> int:
+        return self.workers or os.cpu_count() or 1
+
+
+class LoggingSettings(BaseSettings):
+    # Rotating files in `dir`; off means stdout only. src.server turns this off
+    # when it runs several workers, since file rotation is not multi-process safe
+    files: bool = Field(default=True)
+    dir: str = Field(default="logs")
+    # Write logs on a background thread behind a bounded queue instead of in the caller
+    queue_enabled: bool = Field(default=True)
+    # Records beyond this many pending are dropped (and counted), never waited for
+    queue_size: int = Field(default=10000)
+    # Fraction of DEBUG/INFO records kept, keyed by "module:function" call site or logger name
+    sample_rates: Dict[str, float] = Field(default_factory=dict)
+    # Collections and long strings passed as log arguments are cut down to this
+    summary_max_items: int = Field(default=5)
+    summary_max_chars: int = Field(default=200)
+    # "json" writes one JSON object per line (with extra fields and request_id)
+    format: Literal["text", "json"] = Field(default="text")
+    # Records of one request are queued together, flushed at this many; 0 disables
+    request_batch_size: int = Field(default=100)
+
+    model_config = ConfigDict(
+        env_prefix="LOG_",
+        env_file=ENV_PATH,
+        case_sensitive=False,
+        extra="ignore"
+    )
+
+
 class AppSettings(BaseSettings):
     app_name: str = Field(default="FastAPI App")
     app_version: str = Field(default="1.0.0")
     debug: bool = Field(default=False)
     log_level: str = Field(default="INFO")
     database: DatabaseSettings = Field(default_factory=DatabaseSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    answer_buffer: AnswerBufferSettings = Field(default_factory=AnswerBufferSettings)
+    results: ResultsSettings = Field(default_factory=ResultsSettings)
+    catalog: CatalogSettings = Field(default_factory=CatalogSettings)
+    server: ServerSettings = Field(default_factory=ServerSettings)
+    logging: LoggingSettings = Field(default_factory=LoggingSettings)
 
     model_config = ConfigDict(
         env_file=ENV_PATH,
@@ -45,10 +188,25 @@ class AppSettings(BaseSettings):
     )
 
 
-settings = AppSettings()
-DATABASE_URL = settings.database.url
-APP_NAME = settings.app_name
-APP_VERSION = settings.app_version
-DEBUG = settings.debug
-LOG_LEVEL = settings.log_level
+@lru_cache(maxsize=None)
+def get_settings() -> AppSettings:
+    """Load the settings (environment and .env) on first use."""
+    return AppSettings()
+
+
+_LAZY_ATTRIBUTES = {
+    "settings": lambda: get_settings(),
+    "DATABASE_URL": lambda: get_settings().database.url,
+    "APP_NAME": lambda: get_settings().app_name,
+    "APP_VERSION": lambda: get_settings().app_version,
+    "DEBUG": lambda: get_settings().debug,
+    "LOG_LEVEL": lambda: get_settings().log_level,
+}
+
+
+def __getattr__(name: str):
+    # Keeps `from src.config.config import settings` working without loading at import
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
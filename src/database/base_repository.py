@@ -1,58 +1,355 @@
-from typing import Generic, TypeVar, Type, List, Optional
+import asyncio
+import contextlib
+import copy
+from functools import lru_cache
+from typing import Any, AsyncIterator, Generic, TypeVar, Type, List, Optional, Sequence, Tuple
 
-from sqlalchemy import and_, or_, select, delete, func
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, select, delete, insert, inspect, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import as_declarative
+from sqlalchemy.orm import as_declarative, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
 
+from src.database.cache import EntityCache, get_entity_cache
+from src.database.pagination import decode_cursor, next_cursor_for
+from src.database.session_hooks import run_after_commit
+from src.database.table_version import table_versions
 from src.exceptions import InvalidFieldError, DatabaseError
+from src.utils.metrics import label_db_operations
 
 ModelT = TypeVar("ModelT")
 
+KEYSET_COLUMNS = ("created_at", "id")
+
+COPY_CHUNK_BYTES = 64 * 1024
+
+# CSV options that never trigger quoting, so each row_to_json() line passes through verbatim
+_NDJSON_COPY_OPTIONS = {"format": "csv", "delimiter": "\x02", "quote": "\x01"}
+
+
+@lru_cache(maxsize=None)
+def projection_columns(
+    model: type,
+    schema: Type[BaseModel],
+    extra: Tuple[str, ...] = ()
+) -> Optional[Tuple[str, ...]]:
+    """
+    Column names of `model` needed to build `schema`, plus `extra`.
+
+    Returns None when the schema needs anything other than plain columns
+    (e.g. a relationship), in which case callers load full entities instead.
+    """
+    column_attrs = inspect(model).column_attrs
+    names = tuple(schema.model_fields)
+    if not all(name in column_attrs for name in names):
+        return None
+    return names + tuple(name for name in extra if name not in names)
+
 
 class BaseRepository(Generic[ModelT]):
     """Generic async repository for CRUD operations."""
 
+    # Subclasses set this to opt into the shared in-process entity cache
+    cache_name: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Queries show up in db_query_duration_seconds as e.g. "UserRepository.get_by_id"
+        label_db_operations(cls)
+
     def __init__(self, model: Type[ModelT], session: AsyncSession):
         self.model = model
         self.session = session
+        self.cache: Optional[EntityCache] = (
+            get_entity_cache(self.cache_name) if self.cache_name else None
+        )
+
+    def invalidate(self, id) -> None:
+        """
+        Evict the cached entity for `id`.
+
+        Call this from any code path that updates a row outside `add`/`delete_by_id`.
+        The entry is evicted immediately and again once the transaction commits,
+        so a concurrent reader cannot re-cache the pre-commit row.
+        """
+        if self.cache is None:
+            return
+        cache = self.cache
+        cache.invalidate(id)
+        run_after_commit(self.session, lambda: cache.invalidate(id))
+
+    async def _cached(self, key) -> Optional[ModelT]:
+        mapper = inspect(self.model)
+        held = self.session.identity_map.get(mapper.identity_key_from_primary_key([key]))
+        if held is not None:
+            # The session's own instance wins: merging the snapshot would overwrite
+            # its unflushed changes. Expired or deleted ones need the query.
+            if held in self.session.deleted or inspect(held).expired_attributes:
+                return None
+            return held
+        snapshot = self.cache.get(key)
+        if snapshot is None:
+            return None
+        # Rebuild a private, clean instance and attach it without emitting a SELECT
+        obj = mapper.class_manager.new_instance()
+        for name, value in copy.deepcopy(snapshot).items():
+            set_committed_value(obj, name, value)
+        make_transient_to_detached(obj)
+        obj = await self.session.merge(obj, load=False)
+        # Relationships are not cached; load the eager ones as a query would have
+        state = inspect(obj)
+        eager = [
+            rel.key for rel in mapper.relationships
+            if rel.lazy in ("selectin", "joined", "subquery") and rel.key in state.unloaded
+        ]
+        if eager:
+            await self.session.refresh(obj, attribute_names=eager)
+        return obj
+
+    def _cache_after_commit(self, obj: ModelT, lookup_key=None) -> None:
+        """
+        Cache a snapshot of `obj`'s column values once its data is committed.
+
+        Only plain values are shared between sessions, never the instance, so
+        other requests cannot see or trip over this session's pending changes.
+        """
+        cache = self.cache
+        state = inspect(obj)
+        columns = [attr.key for attr in state.mapper.column_attrs]
+
+        def store() -> None:
+            loaded = state.dict
+            # Expired or deferred columns would need a query; skip caching instead
+            if state.deleted or state.detached or state.modified or not all(name in loaded for name in columns):
+                return
+            cache.set(obj.id, copy.deepcopy({name: loaded[name] for name in columns}))
+            if lookup_key is not None:
+                cache.set(lookup_key, obj.id)
+
+        if self.session.sync_session.get_bind().get_execution_options().get("isolation_level") == "AUTOCOMMIT":
+            # Every statement has committed already
+            store()
+        else:
+            run_after_commit(self.session, store)
 
     async def add(self, obj: ModelT) -> ModelT:
+        """
+        Insert `obj` and its cascaded children in a single flush.
+
+        Generated columns come back through `INSERT ... RETURNING` (the models use
+        `eager_defaults`), so no follow-up SELECT is needed to refresh the object.
+        """
         try:
             self.session.add(obj)
             await self.session.flush()
-            await self.session.refresh(obj)
+            self.invalidate(obj.id)
             return obj
         except Exception as e:
             raise DatabaseError(f"Error adding {self.model.__name__}: {str(e)}")
 
-    async def list_by(self, filters: dict = None) -> List[ModelT]:
+    async def add_many(self, rows: List[dict], chunk_size: int = 1000) -> List[ModelT]:
+        """
+        Insert many rows with one multi-row `INSERT ... RETURNING` per chunk.
+
+        Returned objects are in the same order as `rows`.
+        """
+        created: List[ModelT] = []
+        stmt = insert(self.model).returning(self.model, sort_by_parameter_order=True)
         try:
-            stmt = select(self.model).order_by(self.model.created_at.desc())
-            if filters:
-                conditions = [getattr(self.model, field) == value for field, value in filters.items()]
-                stmt = stmt.where(and_(*conditions))
+            for start in range(0, len(rows), chunk_size):
+                result = await self.session.scalars(stmt, rows[start:start + chunk_size])
+                created.extend(result.all())
+        except Exception as e:
+            raise DatabaseError(f"Error adding {self.model.__name__} rows: {str(e)}", operation="add_many")
+        for obj in created:
+            self.invalidate(obj.id)
+        return created
+
+    def _select(
+        self,
+        projection: Optional[Type[BaseModel]] = None,
+        extra: Tuple[str, ...] = ()
+    ) -> Tuple[Select, bool]:
+        """Build the base SELECT, projected to `projection`'s columns when possible."""
+        columns = projection_columns(self.model, projection, extra) if projection else None
+        if columns is None:
+            return select(self.model), False
+        return select(*(getattr(self.model, name) for name in columns)), True
+
+    def _filter(self, stmt: Select, filters: Optional[dict]) -> Select:
+        if not filters:
+            return stmt
+        try:
+            conditions = [getattr(self.model, field) == value for field, value in filters.items()]
+        except AttributeError as e:
+            raise InvalidFieldError(f"Invalid field in filters: {str(e)}")
+        return stmt.where(and_(*conditions))
+
+    async def list_by(
+        self,
+        filters: dict = None,
+        projection: Optional[Type[BaseModel]] = None
+    ) -> Sequence[Any]:
+        """
+        List rows newest first.
+
+        With `projection`, only the columns that schema reads are selected and
+        lightweight rows are returned instead of tracked ORM instances.
+        """
+        try:
+            stmt, projected = self._select(projection)
+            stmt = self._filter(stmt.order_by(self.model.created_at.desc()), filters)
             result = await self.session.execute(stmt)
-            return result.scalars().all()
+            return result.all() if projected else result.scalars().all()
         except Exception as e:
             raise InvalidFieldError(f"Invalid field in filters: {str(e)}")
-        
-    
-    
+
+    async def stream_by(
+        self,
+        filters: dict = None,
+        batch_size: int = 1000,
+        projection: Optional[Type[BaseModel]] = None
+    ) -> AsyncIterator[Sequence[Any]]:
+        """
+        Yield rows in batches of `batch_size` through a server-side cursor.
+
+        Must run inside a transaction; the session has to stay open until the
+        iterator is exhausted.
+        """
+        stmt, projected = self._select(projection)
+        stmt = self._filter(
+            stmt.order_by(self.model.created_at.desc(), self.model.id.desc())
+            .execution_options(yield_per=batch_size),
+            filters
+        )
+        if projected:
+            result = await self.session.stream(stmt)
+        else:
+            result = await self.session.stream_scalars(stmt)
+        async for partition in result.partitions():
+            yield partition
+
+    async def list_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: dict = None,
+        projection: Optional[Type[BaseModel]] = None
+    ) -> Tuple[Sequence[Any], Optional[str]]:
+        """
+        Return one page ordered by `(created_at, id)` descending using keyset pagination.
+
+        The cursor marks the last row of the previous page, so every page is an
+        index range scan of `limit + 1` rows regardless of how deep the client is.
+        """
+        stmt, projected = self._select(projection, extra=KEYSET_COLUMNS)
+        stmt = stmt.order_by(self.model.created_at.desc(), self.model.id.desc()).limit(limit + 1)
+        if cursor:
+            created_at, last_id = decode_cursor(cursor, self.model.id.type.python_type)
+            stmt = stmt.where(
+                tuple_(self.model.created_at, self.model.id) < tuple_(created_at, last_id)
+            )
+        stmt = self._filter(stmt, filters)
+        result = await self.session.execute(stmt)
+        rows = result.all() if projected else result.scalars().all()
+        return rows[:limit], next_cursor_for(rows, limit)
+
+    async def table_version(self) -> int:
+        """
+        Change counter for the whole table, read from one `table_versions` row.
+
+        Used to derive ETags without loading the rows themselves. The table
+        must be `versioned`; otherwise this stays 0.
+        """
+        stmt = select(table_versions.c.version).where(table_versions.c.table_name == self.model.__tablename__)
+        return (await self.session.execute(stmt)).scalar() or 0
+
+    async def copy_query(self, query: str, *args, format: str = "csv") -> AsyncIterator[bytes]:
+        """
+        Stream the result of `query` with `COPY ... TO STDOUT` as CSV (with header) or NDJSON.
+
+        Rows never become Python objects: asyncpg hands over raw protocol
+        chunks, which are coalesced to roughly `COPY_CHUNK_BYTES`. A small
+        bounded queue between the COPY and the consumer provides backpressure.
+        `args` are bound as `$1`, `$2`, ...
+        """
+        if format == "ndjson":
+            query = f"SELECT row_to_json(export_row) FROM ({query}) AS export_row"
+            options = _NDJSON_COPY_OPTIONS
+        else:
+            options = {"format": "csv", "header": True}
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+
+        queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=16)
+
+        async def sink(data: bytes) -> None:
+            await queue.put(bytes(data))
+
+        async def run_copy() -> None:
+            try:
+                await driver_connection.copy_from_query(query, *args, output=sink, **options)
+            finally:
+                await queue.put(None)
+
+        copy_task = asyncio.create_task(run_copy())
+        try:
+            buffer = bytearray()
+            while True:
+                data = await queue.get()
+                if data is None:
+                    break
+                buffer += data
+                if len(buffer) >= COPY_CHUNK_BYTES or queue.empty():
+                    yield bytes(buffer)
+                    buffer.clear()
+            if buffer:
+                yield bytes(buffer)
+            await copy_task
+        finally:
+            if not copy_task.done():
+                copy_task.cancel()
+                # Let the COPY unwind before the connection is handed back
+                with contextlib.suppress(asyncio.CancelledError):
+                    await copy_task
+
     async def get_by_id(self, id) -> Optional[ModelT]:
+        if self.cache is not None:
+            cached = await self._cached(id)
+            if cached is not None:
+                return cached
         stmt = select(self.model).where(self.model.id == id)
         result = await self.session.execute(stmt)
-        return result.scalars().first()
-    
+        obj = result.scalars().first()
+        if obj is not None and self.cache is not None:
+            self._cache_after_commit(obj)
+        return obj
+
     async def get_by(self, **filters) -> Optional[ModelT]:
+        lookup_key = ("by", tuple(sorted(filters.items()))) if self.cache is not None else None
+        if lookup_key is not None:
+            # Lookups map to an id; the snapshot itself is shared with get_by_id
+            id = self.cache.get(lookup_key)
+            if id is not None:
+                cached = await self._cached(id)
+                if cached is not None and all(
+                    getattr(cached, field) == value for field, value in filters.items()
+                ):
+                    return cached
         stmt = select(self.model)
         if filters:
             conditions = [getattr(self.model, field) == value for field, value in filters.items()]
             stmt = stmt.where(and_(*conditions))
         result = await self.session.execute(stmt)
-        return result.scalars().first()
-
+        obj = result.scalars().first()
+        if obj is not None and lookup_key is not None:
+            self._cache_after_commit(obj, lookup_key)
+        return obj
 
     async def delete_by_id(self, id) -> int:
         stmt = delete(self.model).where(self.model.id == id)
         result = await self.session.execute(stmt)
-        return result.rowcount
\ No newline at end of file
+        self.invalidate(id)
+        return result.rowcount
@@ -0,0 +1,127 @@
+"""
+In-process read-through cache for repository entities.
+
+Each cached model gets one bounded LRU with a TTL. Writes made through the
+repository invalidate entries in this process; an `InvalidationHook` is told
+about every invalidation so deployments with several workers can broadcast it.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from src.config.config import get_settings
+
+
+class InvalidationHook:
+    """Receives every local invalidation. The default does nothing."""
+
+    def publish(self, cache_name: str, key: Optional[Hashable]) -> None:
+        """`key` is None when the whole cache was cleared."""
+
+
+class EntityCache:
+    """Bounded LRU cache with per-entry TTL and hit/miss counters."""
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable, publish: bool = True) -> None:
+        self._entries.pop(key, None)
+        if publish:
+            _invalidation_hook.publish(self.name, key)
+
+    def clear(self, publish: bool = True) -> None:
+        self._entries.clear()
+        if publish:
+            _invalidation_hook.publish(self.name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+CACHE_REGISTRY: Dict[str, EntityCache] = {}
+_invalidation_hook: InvalidationHook = InvalidationHook()
+
+
+def get_entity_cache(name: str) -> Optional[EntityCache]:
+    """Return the shared cache for `name`, or None when entity caching is disabled."""
+    config = get_settings().cache
+    if not config.enabled:
+        return None
+    cache = CACHE_REGISTRY.get(name)
+    if cache is None:
+        cache = CACHE_REGISTRY[name] = EntityCache(
+            name,
+            maxsize=config.maxsize,
+            ttl=config.ttl_seconds
+        )
+    return cache
+
+
+def set_invalidation_hook(hook: InvalidationHook) -> None:
+    global _invalidation_hook
+    _invalidation_hook = hook
+
+
+def apply_remote_invalidation(cache_name: str, key: Optional[Hashable]) -> None:
+    """Apply an invalidation broadcast by another worker without re-publishing it."""
+    cache = CACHE_REGISTRY.get(cache_name)
+    if cache is None:
+        return
+    if key is None:
+        cache.clear(publish=False)
+    else:
+        cache.invalidate(key, publish=False)
+
+
+__all__ = [
+    "EntityCache",
+    "InvalidationHook",
+    "CACHE_REGISTRY",
+    "get_entity_cache",
+    "set_invalidation_hook",
+    "apply_remote_invalidation",
+]
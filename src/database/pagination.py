@@ -0,0 +1,38 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from src.exceptions import ValidationError
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, id: Any) -> str:
+    """Encode the keyset position of a row into an opaque URL-safe cursor."""
+    raw = json.dumps([created_at.isoformat(), str(id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, id_type: type) -> Tuple[datetime, Any]:
+    """Decode a cursor produced by `encode_cursor` back into `(created_at, id)`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, raw_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), id_type(raw_id)
+    except Exception:
+        raise ValidationError(
+            "Invalid pagination cursor",
+            error_code="INVALID_CURSOR",
+            details={"cursor": cursor}
+        )
+
+
+def next_cursor_for(rows: list, limit: int) -> Optional[str]:
+    """Return the cursor for the page after `rows`, or None on the last page."""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,66 @@
+"""
+Connection pool instrumentation.
+
+`InstrumentedAsyncPool` is the engine's default async queue pool plus
+counters for how long callers wait to acquire a connection. `pool_status()`
+combines those counters with the pool's own gauges, so pool sizes can be
+checked against the server's `max_connections` across all workers.
+"""
+
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+
+@dataclass
+class PoolWaitStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def connect(self):
+        # Covers queue waits as well as opening new (overflow) connections and pre-ping
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        stats = self.wait_stats
+        stats.checkouts += 1
+        stats.total_wait_seconds += waited
+        stats.max_wait_seconds = max(stats.max_wait_seconds, waited)
+        return connection
+
+
+def pool_status(pool: Pool) -> dict:
+    """Current gauges and cumulative wait counters for `pool`."""
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {"pool_class": type(pool).__name__}
+    status = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # QueuePool counts overflow from -size until the pool is full
+        "overflow": max(pool.overflow(), 0),
+        # Upper bound this process can hold; multiply by workers for the server-side total
+        "max_connections": pool.size() + max(pool._max_overflow, 0),
+    }
+    if isinstance(pool, InstrumentedAsyncPool):
+        stats = pool.wait_stats
+        status.update(asdict(stats))
+        status["avg_wait_seconds"] = stats.total_wait_seconds / stats.checkouts if stats.checkouts else 0.0
+    return status
@@ -1,21 +1,168 @@
-import os
-from typing import AsyncGenerator
+import asyncio
+from contextlib import AsyncExitStack
+from time import perf_counter
+from typing import AsyncGenerator, Dict, NamedTuple, Optional
 
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from src.config.config import DATABASE_URL
+from src.config.config import DatabaseSettings, get_settings
+from src.database.pool import InstrumentedAsyncPool
+from src.database.replica import ReplicaRouter
+from src.utils.logger import database_logger
+from src.utils.metrics import observe_query
+from src.utils.request_timing import record_query
 
 
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    context._query_started = perf_counter()
 
-engine: AsyncEngine = create_async_engine(DATABASE_URL, future=True)
 
-async_session_maker = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = perf_counter() - context._query_started
+    record_query(elapsed)
+    observe_query(elapsed)
+
+
+def instrument_query_timing(engine: AsyncEngine) -> None:
+    """Count statements executed on `engine` and their time, per request and in the query metrics."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _create_engine(url: str, config: DatabaseSettings) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        future=True,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.pool_timeout,
+        pool_recycle=config.pool_recycle,
+        pool_pre_ping=config.pool_pre_ping,
+        connect_args={"statement_cache_size": config.statement_cache_size}
+    )
+    instrument_query_timing(engine)
+    return engine
+
+
+class ReadSessionMakers(NamedTuple):
+    # No BEGIN/COMMIT: asyncpg runs each statement in its own implicit transaction
+    autocommit: sessionmaker
+    # One "BEGIN READ ONLY"; needed for server-side cursors (streaming)
+    read_only: sessionmaker
+
+
+def read_session_makers(bind: AsyncEngine) -> ReadSessionMakers:
+    """Session makers for read-only work on `bind`; they share its connection pool."""
+    return ReadSessionMakers(
+        autocommit=sessionmaker(
+            bind.execution_options(isolation_level="AUTOCOMMIT"), class_=AsyncSession, expire_on_commit=False
+        ),
+        read_only=sessionmaker(
+            bind.execution_options(postgresql_readonly=True), class_=AsyncSession, expire_on_commit=False
+        )
+    )
+
+
+class Database:
+    """Engines and session makers for the primary and the optional read replica."""
+
+    def __init__(self, config: DatabaseSettings):
+        self.config = config
+        self.engine = _create_engine(config.url, config)
+        self.session_maker = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.replica_engine: Optional[AsyncEngine] = (
+            _create_engine(config.replica_url, config) if config.replica_url else None
+        )
+        self.replica_router = ReplicaRouter(
+            self.engine,
+            self.replica_engine,
+            max_lag_seconds=config.replica_max_lag_seconds,
+            check_interval=config.replica_check_interval_seconds,
+            probe_timeout=config.replica_probe_timeout_seconds
+        )
+        self._read_session_makers: Dict[AsyncEngine, ReadSessionMakers] = {
+            self.engine: read_session_makers(self.engine)
+        }
+        if self.replica_engine is not None:
+            self._read_session_makers[self.replica_engine] = read_session_makers(self.replica_engine)
+
+    async def read_session_makers(self) -> ReadSessionMakers:
+        """Read session makers for the replica when it is healthy, the primary otherwise."""
+        return self._read_session_makers[await self.replica_router.engine()]
+
+    async def warm_up(self, connections: int) -> None:
+        """Open up to `connections` pooled connections (capped at the pool size) ahead of traffic."""
+        connections = min(connections, self.config.pool_size)
+        if connections <= 0:
+            return
+        # Hold them all at once so the pool has to open distinct connections
+        async with AsyncExitStack() as stack:
+            opened = await asyncio.gather(
+                *(stack.enter_async_context(self.engine.connect()) for _ in range(connections))
+            )
+            await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in opened))
+        database_logger.info("Warmed up %s database connections", connections)
+
+    async def dispose(self) -> None:
+        await self.replica_router.close()
+        await self.engine.dispose()
+        if self.replica_engine is not None:
+            await self.replica_engine.dispose()
+
+
+_database: Optional[Database] = None
+
+
+def get_database() -> Database:
+    """Return the process-wide database, creating its engines on first use."""
+    global _database
+    if _database is None:
+        _database = Database(get_settings().database)
+    return _database
+
+
+async def dispose_database() -> None:
+    """Close every pooled connection; the next `get_database()` starts afresh."""
+    global _database
+    if _database is not None:
+        database, _database = _database, None
+        await database.dispose()
+
+
+def __getattr__(name: str):
+    # `engine` and `async_session_maker` used to be created at import time
+    if name == "engine":
+        return get_database().engine
+    if name == "async_session_maker":
+        return get_database().session_maker
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """Yield an async SQLAlchemy Session for dependency injection."""
-    async with async_session_maker() as session:
+    async with get_database().session_maker() as session:
+        async with session.begin():
+            yield session
+
+
+async def get_read_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yield an autocommit session for read-only work.
+
+    No transaction is opened, so a read costs no BEGIN/COMMIT round trips and
+    the connection goes back to the pool as soon as the session is closed.
+    Runs on the replica when one is configured and healthy.
+    """
+    makers = await get_database().read_session_makers()
+    async with makers.autocommit() as session:
+        yield session
+
+
+async def get_read_stream_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Yield a session in a READ ONLY transaction, for reads that stream through a server-side cursor."""
+    makers = await get_database().read_session_makers()
+    async with makers.read_only() as session:
         async with session.begin():
-            yield session
\ No newline at end of file
+            yield session
@@ -0,0 +1,90 @@
+"""
+Routing of read-only work to an optional replica engine.
+
+The replica is probed in the background at most once per `check_interval`
+seconds, and each probe gives up after `probe_timeout` seconds. Reads go to the
+replica while the last probe found it answering within `max_lag_seconds`, and
+to the primary otherwise (including before the first probe completes).
+"""
+
+import asyncio
+import contextlib
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.utils.logger import database_logger
+
+
+# 0 on a primary (or a stand-in database) and on a replica that has replayed
+# everything it received; NULL while a replica has not replayed anything yet
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replica: Optional[AsyncEngine] = None,
+        max_lag_seconds: float = 5.0,
+        check_interval: float = 5.0,
+        probe_timeout: float = 2.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self._clock = clock
+        self._healthy = False
+        self._checked_at: Optional[float] = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    async def engine(self) -> AsyncEngine:
+        """The replica engine if the last probe found it usable, the primary otherwise; never waits for a probe."""
+        if self.replica is None:
+            return self.primary
+        if not self._fresh() and (self._probe_task is None or self._probe_task.done()):
+            self._probe_task = asyncio.create_task(self.refresh())
+        return self.replica if self._healthy else self.primary
+
+    def _fresh(self) -> bool:
+        return self._checked_at is not None and self._clock() - self._checked_at < self.check_interval
+
+    async def refresh(self) -> bool:
+        """Probe the replica now and route reads by the result."""
+        self._healthy = await self._probe()
+        self._checked_at = self._clock()
+        return self._healthy
+
+    async def close(self) -> None:
+        if self._probe_task is not None and not self._probe_task.done():
+            self._probe_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._probe_task
+
+    async def _probe(self) -> bool:
+        try:
+            lag = await asyncio.wait_for(self._replica_lag(), self.probe_timeout)
+        except Exception as e:
+            database_logger.warning("Read replica unavailable, reading from primary: %r", e)
+            return False
+        if lag is None or lag > self.max_lag_seconds:
+            database_logger.warning("Read replica lag %ss exceeds %ss, reading from primary", lag, self.max_lag_seconds)
+            return False
+        return True
+
+    async def _replica_lag(self) -> Optional[float]:
+        async with self.replica.connect() as connection:
+            return (await connection.execute(REPLICA_LAG_QUERY)).scalar()
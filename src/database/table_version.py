@@ -0,0 +1,36 @@
+"""Per-table change counters, bumped by a statement-level trigger on every write."""
+
+from sqlalchemy import DDL, BigInteger, Column, String, Table, event
+
+from src.database.base import Base
+
+
+table_versions = Table(
+    "table_versions",
+    Base.metadata,
+    Column("table_name", String, primary_key=True),
+    Column("version", BigInteger, nullable=False, server_default="0"),
+)
+
+BUMP_TABLE_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def bump_table_version_trigger(table_name: str) -> str:
+    return (
+        f"CREATE TRIGGER {table_name}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name} "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+    )
+
+
+def versioned(table: Table) -> None:
+    """Keep `table_versions` up to date for `table` when the schema is created from the models."""
+    event.listen(table, "after_create", DDL(BUMP_TABLE_VERSION_FUNCTION))
+    event.listen(table, "after_create", DDL(bump_table_version_trigger(table.name)))
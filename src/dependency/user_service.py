@@ -4,7 +4,7 @@ from fastapi import Depends
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.postgres_conn import get_async_session
+from src.database.postgres_conn import get_async_session, get_read_async_session, get_read_stream_async_session
 from src.user_profile.service import UserService
 
 
@@ -13,3 +13,16 @@ async def get_user_service(
 ) -> AsyncGenerator[UserService, None]:
     return UserService(session)
 
+
+async def get_user_read_service(
+    session: AsyncSession = Depends(get_read_async_session),
+) -> AsyncGenerator[UserService, None]:
+    """UserService for read-only endpoints: no transaction, may be served by the read replica."""
+    return UserService(session)
+
+
+async def get_user_stream_service(
+    session: AsyncSession = Depends(get_read_stream_async_session),
+) -> AsyncGenerator[UserService, None]:
+    """UserService for endpoints that stream through a server-side cursor."""
+    return UserService(session)
@@ -4,7 +4,8 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 
 from .exceptions import AppException, DatabaseError
-from .utils.logger import logger
+from .utils.logger import current_request_id, logger
+from .utils.metrics import count_exception
 
 
 class ErrorResponse:
@@ -27,19 +28,18 @@ class ErrorResponse:
 
 
 async def app_exception_handler(request: Request, exc: AppException) -> JSONResponse:
+    count_exception(exc.error_code)
     error_response = ErrorResponse.format(
         message=exc.message,
         error_code=exc.error_code,
         status_code=exc.status_code,
         details=exc.details,
-        request_id=request.headers.get("X-Request-ID")
+        request_id=current_request_id()
     )
     
-    log_message = f"{exc.error_code}: {exc.message}"
-    
     if exc.status_code >= 500:
         logger.error(
-            log_message,
+            "%s: %s", exc.error_code, exc.message,
             extra={
                 "error_code": exc.error_code,
                 "status_code": exc.status_code,
@@ -50,7 +50,7 @@ async def app_exception_handler(request: Request, exc: AppException) -> JSONResp
         )
     else:
         logger.warning(
-            log_message,
+            "%s: %s", exc.error_code, exc.message,
             extra={
                 "error_code": exc.error_code,
                 "status_code": exc.status_code,
@@ -70,6 +70,7 @@ async def validation_exception_handler(
     request: Request,
     exc: RequestValidationError
 ) -> JSONResponse:
+    count_exception("VALIDATION_ERROR")
     errors = {}
     for error in exc.errors():
         field = error["loc"][-1] if error["loc"] else "body"
@@ -80,7 +81,7 @@ async def validation_exception_handler(
         error_code="VALIDATION_ERROR",
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         details={"validation_errors": errors},
-        request_id=request.headers.get("X-Request-ID")
+        request_id=current_request_id()
     )
     
     logger.warning(
@@ -103,16 +104,17 @@ async def global_exception_handler(
     request: Request,
     exc: Exception
 ) -> JSONResponse:
+    count_exception("INTERNAL_ERROR")
     error_response = ErrorResponse.format(
         message="An unexpected error occurred",
         error_code="INTERNAL_ERROR",
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         details={},
-        request_id=request.headers.get("X-Request-ID")
+        request_id=current_request_id()
     )
     
     logger.error(
-        f"Unexpected error: {str(exc)}",
+        "Unexpected error: %s", exc,
         extra={
             "error_code": "INTERNAL_ERROR",
             "exception_type": type(exc).__name__,
@@ -130,18 +132,19 @@ async def global_exception_handler(
 
 
 async def database_exception_handler(request: Request, exc: DatabaseError) -> JSONResponse:
+    count_exception(exc.error_code)
     # Format the response consistently with ErrorResponse
     error_response = ErrorResponse.format(
         message=exc.message,
         error_code=exc.error_code,
         status_code=exc.status_code,
         details=exc.details,
-        request_id=request.headers.get("X-Request-ID")
+        request_id=current_request_id()
     )
 
     # Log the error for debugging
     logger.error(
-        f"Database error: {exc.message}",
+        "Database error: %s", exc.message,
         extra={
             "error_code": exc.error_code,
             "exception_type": type(exc).__name__,
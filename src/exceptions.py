@@ -195,6 +195,22 @@ class ForbiddenError(AppException):
         )
 
 
+class ServiceUnavailableError(AppException):
+    """Service is temporarily overloaded."""
+    
+    def __init__(
+        self,
+        message: str = "Service temporarily unavailable",
+        details: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(
+            message=message,
+            status_code=503,
+            error_code="SERVICE_UNAVAILABLE",
+            details=details
+        )
+
+
 class ConfigurationError(AppException):
     """Configuration is invalid."""
     
@@ -219,10 +235,13 @@ ERROR_CODE_TO_STATUS = {
     "INVALID_FIELD": 400,
     "INVALID_OPERATOR": 400,
     "INVALID_SORT_ORDER": 400,
+    "INVALID_CURSOR": 400,
+    "INVALID_ANSWER": 400,
     "RESOURCE_NOT_FOUND": 404,
     "UNAUTHORIZED": 401,
     "FORBIDDEN": 403,
     "DATABASE_ERROR": 500,
+    "SERVICE_UNAVAILABLE": 503,
     "CONFIGURATION_ERROR": 500,
     "INTERNAL_ERROR": 500,
 }
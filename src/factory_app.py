@@ -1,7 +1,11 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 
 
+from src.config.config import get_settings
+from src.database.postgres_conn import dispose_database, get_database
 from src.exceptions import AppException, DatabaseError
 from src.exception_handlers import (
     app_exception_handler,
@@ -9,7 +13,31 @@ from src.exception_handlers import (
     global_exception_handler,
     database_exception_handler
 )
+from src.system.controller import SYSTEM_SERVICE
+from src.user_profile.answer_buffer import start_answer_buffer, stop_answer_buffer
 from src.user_profile.controller import USER_SERVICE
+from src.user_profile.live_results import start_results_fan_out, stop_results_fan_out
+from src.utils.logger import configure_logging, logger, shutdown_logging
+from src.utils.metrics import metrics_endpoint
+from src.utils.request_context import RequestContextMiddleware
+from src.utils.request_timing import ServerTimingMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own process-wide resources: logging, the database engines and background workers."""
+    configure_logging()
+    database = get_database()
+    await database.warm_up(get_settings().database.pool_warmup_connections)
+    await start_answer_buffer(database.session_maker)
+    start_results_fan_out(database.engine.url)
+    logger.info("Application started")
+    yield
+    await stop_results_fan_out()
+    await stop_answer_buffer()
+    await dispose_database()
+    logger.info("Application stopped")
+    shutdown_logging()
 
 
 def create_app() -> FastAPI:
@@ -19,11 +47,17 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/api/v1/docs",
         redoc_url="/api/v1/redoc",
-        openapi_url="/api/v1/openapi.json"
+        openapi_url="/api/v1/openapi.json",
+        lifespan=lifespan
     )
     app.add_exception_handler(AppException, app_exception_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(Exception, global_exception_handler)
     app.add_exception_handler(DatabaseError, database_exception_handler)
+    # The last one added runs first: the request id is bound before timing starts
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(RequestContextMiddleware)
     app.include_router(USER_SERVICE, prefix="/api/v1/user")
+    app.include_router(SYSTEM_SERVICE, prefix="/api/v1/system")
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
     return app
\ No newline at end of file
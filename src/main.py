@@ -4,5 +4,6 @@ from src.factory_app import create_app
 app = create_app()
 
 
+# Development server; run `python -m src.server` for multi-worker production mode
 if __name__ == "__main__":
     uvicorn.run("src.main:app", host="127.0.0.1", port=8000, reload=True)
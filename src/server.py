@@ -0,0 +1,109 @@
+"""Production entrypoint: `python -m src.server` runs one gunicorn (or uvicorn) worker per CPU."""
+
+import importlib.util
+import os
+from pathlib import Path
+from typing import Optional
+
+import uvicorn
+
+from src.config.config import ServerSettings, get_settings
+from src.utils.logger import configure_logging, logger
+
+
+APP_PATH = "src.main:app"
+METRICS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+def prepare_metrics_dir(path: str) -> None:
+    """Start multiprocess metrics from an empty `path`; must run before the app is imported."""
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.db"):
+        stale.unlink()
+    os.environ[METRICS_DIR_ENV] = str(directory)
+
+
+def _mark_worker_dead(server, worker) -> None:
+    # Drops the exited worker from the live gauges (requests in flight)
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def _use_gunicorn(config: ServerSettings) -> bool:
+    if config.manager == "auto":
+        return importlib.util.find_spec("gunicorn") is not None
+    return config.manager == "gunicorn"
+
+
+def gunicorn_options(config: ServerSettings) -> dict:
+    return {
+        "bind": f"{config.host}:{config.port}",
+        "workers": config.worker_count,
+        "preload_app": config.preload_app,
+        "max_requests": config.max_requests,
+        "max_requests_jitter": config.max_requests_jitter if config.max_requests else 0,
+        "keepalive": config.keep_alive_seconds,
+        "backlog": config.backlog,
+        "graceful_timeout": config.graceful_timeout_seconds,
+    }
+
+
+def run_gunicorn(config: ServerSettings, metrics_dir: Optional[str] = None) -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": config.loop, "http": config.http}
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options(config).items():
+                self.cfg.set(key, value)
+            self.cfg.set("worker_class", Worker)
+            if metrics_dir:
+                self.cfg.set("child_exit", _mark_worker_dead)
+
+        def load(self):
+            from src.main import app
+            return app
+
+    Application().run()
+
+
+def run_uvicorn(config: ServerSettings) -> None:
+    uvicorn.run(
+        APP_PATH,
+        host=config.host,
+        port=config.port,
+        workers=config.worker_count,
+        loop=config.loop,
+        http=config.http,
+        limit_max_requests=config.max_requests or None,
+        timeout_keep_alive=config.keep_alive_seconds,
+        backlog=config.backlog,
+        timeout_graceful_shutdown=config.graceful_timeout_seconds
+    )
+
+
+def main() -> None:
+    config = get_settings().server
+    if config.worker_count > 1:
+        # Workers sharing one rotating log file would rotate it under each other:
+        # log to stdout only (inherited by the workers) and let the supervisor collect it
+        os.environ["LOG_FILES"] = "false"
+        get_settings.cache_clear()
+    configure_logging()
+    metrics_dir = config.metrics_multiproc_dir or os.environ.get(METRICS_DIR_ENV)
+    if metrics_dir:
+        prepare_metrics_dir(metrics_dir)
+    manager = "gunicorn" if _use_gunicorn(config) else "uvicorn"
+    logger.info("Starting %s %s workers on %s:%s", config.worker_count, manager, config.host, config.port)
+    if manager == "gunicorn":
+        run_gunicorn(config, metrics_dir)
+    else:
+        run_uvicorn(config)
+
+
+if __name__ == "__main__":
+    main()
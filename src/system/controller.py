@@ -0,0 +1,16 @@
+from fastapi import APIRouter, status
+from src.database.pool import pool_status
+from src.database.postgres_conn import get_database
+from src.system.schemas import PoolStatus
+from src.utils.logger import controller_logger
+from src.utils.request_timing import TimedRoute
+
+
+SYSTEM_SERVICE = APIRouter(route_class=TimedRoute)
+
+
+@SYSTEM_SERVICE.post("/db/pool", response_model=PoolStatus, tags=["System"], status_code=status.HTTP_200_OK)
+async def database_pool_status():
+    """Connection pool gauges and cumulative checkout wait times for this worker."""
+    controller_logger.info("Reading database pool status")
+    return pool_status(get_database().engine.pool)
@@ -0,0 +1,19 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class PoolStatus(BaseModel):
+    pool_class: str
+    size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout_seconds: Optional[float] = None
+    checked_out: Optional[int] = None
+    idle: Optional[int] = None
+    overflow: Optional[int] = None
+    max_connections: Optional[int] = None
+    checkouts: Optional[int] = None
+    timeouts: Optional[int] = None
+    total_wait_seconds: Optional[float] = None
+    max_wait_seconds: Optional[float] = None
+    avg_wait_seconds: Optional[float] = None
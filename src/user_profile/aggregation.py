@@ -0,0 +1,56 @@
+"""
+Per-question answer tallies.
+
+Answers are mapped to count buckets when they are ingested, and the resulting
+deltas are applied to `answer_aggregates` in the same transaction as the
+answers themselves. `src.commands.rebuild_aggregates` recomputes the whole
+table from `user_answers` to reconcile any drift.
+"""
+
+import json
+from collections import Counter
+from typing import Any, Iterable, List, Tuple
+
+from src.user_profile.schemas import QuestionType
+
+
+RESPONSES_BUCKET = "responses"
+
+# (question_id, bucket) -> count
+AggregateDeltas = Counter
+
+
+def option_bucket(option_id: int) -> str:
+    return f"option:{option_id}"
+
+
+def cell_bucket(row: str, col: str) -> str:
+    return "cell:" + json.dumps([row, col], separators=(",", ":"))
+
+
+def parse_cell_bucket(bucket: str) -> Tuple[str, str]:
+    row, col = json.loads(bucket[len("cell:"):])
+    return row, col
+
+
+def answer_buckets(question_type: QuestionType, answer_data: Any) -> List[str]:
+    """Buckets one (already validated) answer increments."""
+    buckets = [RESPONSES_BUCKET]
+    if question_type == QuestionType.SINGLE_CHOICE:
+        buckets.append(option_bucket(answer_data))
+    elif question_type == QuestionType.MULTIPLE_CHOICE:
+        buckets.extend(option_bucket(option_id) for option_id in answer_data)
+    elif question_type == QuestionType.MATRIX_ONE:
+        buckets.extend(cell_bucket(row, col) for row, col in answer_data.items())
+    elif question_type == QuestionType.MATRIX_ANY:
+        buckets.extend(cell_bucket(row, col) for row, cols in answer_data.items() for col in cols)
+    return buckets
+
+
+def count_answers(answers: Iterable[Tuple[int, QuestionType, Any]]) -> AggregateDeltas:
+    """Tally `(question_id, question_type, answer_data)` triples into aggregate deltas."""
+    deltas: AggregateDeltas = Counter()
+    for question_id, question_type, answer_data in answers:
+        for bucket in answer_buckets(question_type, answer_data):
+            deltas[(question_id, bucket)] += 1
+    return deltas
@@ -0,0 +1,185 @@
+"""
+Write-behind buffer for answer submissions.
+
+Requests enqueue their validated rows and wait; a single background flusher
+drains the queue every `flush_interval_ms` or once `max_batch_rows` rows are
+pending, writes them with one bulk INSERT (plus one aggregate upsert) in its
+own transaction and then
+acknowledges every submission in the batch. A request therefore returns only
+after its rows are committed.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from collections import Counter
+from typing import Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.config import get_settings
+from src.exceptions import ServiceUnavailableError
+from src.user_profile.aggregation import AggregateDeltas
+from src.user_profile.live_results import results_broadcaster
+from src.user_profile.repository import AnswerAggregateRepository, UserAnswerRepository
+from src.utils.logger import service_logger
+
+
+@dataclass
+class _PendingSubmission:
+    rows: List[dict]
+    deltas: AggregateDeltas
+    done: asyncio.Future
+
+
+class AnswerWriteBuffer:
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_batch_rows: int = 5000,
+        flush_interval_ms: int = 50,
+        max_queue_depth: int = 10000,
+        backpressure: str = "block",
+        enqueue_timeout_seconds: float = 1.0
+    ):
+        self.session_factory = session_factory
+        self.max_batch_rows = max_batch_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.backpressure = backpressure
+        self.enqueue_timeout = enqueue_timeout_seconds
+        self._queue: "asyncio.Queue[_PendingSubmission]" = asyncio.Queue(maxsize=max_queue_depth)
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="answer-write-buffer")
+
+    async def stop(self) -> None:
+        """Flush everything already queued, then stop the flusher."""
+        if self._task is None:
+            return
+        self._closing = True
+        await self._task
+        self._task = None
+
+    async def submit(self, rows: List[dict], deltas: AggregateDeltas) -> None:
+        """Enqueue `rows` and wait until the batch containing them is committed."""
+        pending = _PendingSubmission(
+            rows=rows,
+            deltas=deltas,
+            done=asyncio.get_running_loop().create_future()
+        )
+        try:
+            if self.backpressure == "reject":
+                self._queue.put_nowait(pending)
+            else:
+                await asyncio.wait_for(self._queue.put(pending), self.enqueue_timeout)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            raise ServiceUnavailableError(
+                "Answer ingestion queue is full, retry later",
+                details={"queue_depth": self._queue.qsize()}
+            )
+        await pending.done
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not (self._closing and self._queue.empty()):
+            try:
+                # Wake up periodically so stop() is noticed on an idle queue
+                first = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+            except asyncio.TimeoutError:
+                continue
+            batch = [first]
+            row_count = len(first.rows)
+            deadline = loop.time() + self.flush_interval
+            while row_count < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(pending)
+                row_count += len(pending.rows)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_PendingSubmission]) -> None:
+        rows = [row for pending in batch for row in pending.rows]
+        deltas: AggregateDeltas = Counter()
+        for pending in batch:
+            deltas.update(pending.deltas)
+        try:
+            await self._write(rows, deltas)
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch, e)
+                return
+            # Retry one submission at a time so a bad row only fails its own request
+            service_logger.warning("Batched answer insert of %s rows failed, retrying individually: %s", len(rows), e)
+            for pending in batch:
+                try:
+                    await self._write(pending.rows, pending.deltas)
+                    results_broadcaster.publish(pending.deltas)
+                    self._resolve([pending])
+                except Exception as single_error:
+                    self._resolve([pending], single_error)
+            return
+        results_broadcaster.publish(deltas)
+        self._resolve(batch)
+
+    async def _write(self, rows: List[dict], deltas: AggregateDeltas) -> None:
+        async with self.session_factory() as session:
+            async with session.begin():
+                await UserAnswerRepository(session).add_many(rows, chunk_size=self.max_batch_rows)
+                await AnswerAggregateRepository(session).increment(deltas)
+
+    @staticmethod
+    def _resolve(batch: List[_PendingSubmission], error: Optional[Exception] = None) -> None:
+        for pending in batch:
+            if pending.done.done():
+                continue
+            if error is None:
+                pending.done.set_result(None)
+            else:
+                pending.done.set_exception(error)
+
+
+answer_buffer: Optional[AnswerWriteBuffer] = None
+
+
+def get_answer_buffer() -> Optional[AnswerWriteBuffer]:
+    """Return the running write-behind buffer, or None when writes are synchronous."""
+    if answer_buffer is None or not answer_buffer.running:
+        return None
+    return answer_buffer
+
+
+async def start_answer_buffer(session_factory: Callable[[], AsyncSession]) -> None:
+    global answer_buffer
+    config = get_settings().answer_buffer
+    if not config.enabled:
+        return
+    answer_buffer = AnswerWriteBuffer(
+        session_factory,
+        max_batch_rows=config.max_batch_rows,
+        flush_interval_ms=config.flush_interval_ms,
+        max_queue_depth=config.max_queue_depth,
+        backpressure=config.backpressure,
+        enqueue_timeout_seconds=config.enqueue_timeout_seconds
+    )
+    answer_buffer.start()
+    service_logger.info("Answer write-behind buffer started")
+
+
+async def stop_answer_buffer() -> None:
+    global answer_buffer
+    if answer_buffer is not None:
+        await answer_buffer.stop()
+        answer_buffer = None
+        service_logger.info("Answer write-behind buffer stopped")
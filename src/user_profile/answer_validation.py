@@ -0,0 +1,83 @@
+"""
+Validation of submitted answers against the question catalog.
+
+Every check runs against the in-memory catalog snapshot, so validating a
+submission never queries the database per answer.
+"""
+
+from typing import Any, Optional
+
+from src.user_profile.schemas import QuestionRead, QuestionType
+
+
+MAX_OPEN_TEXT_LENGTH = 5000
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_single_choice(question: QuestionRead, data: Any) -> Optional[str]:
+    option_ids = {option.id for option in question.options or []}
+    if not _is_int(data):
+        return "Expected a single option id"
+    if data not in option_ids:
+        return f"Option {data} does not belong to question {question.id}"
+    return None
+
+
+def _check_multiple_choice(question: QuestionRead, data: Any) -> Optional[str]:
+    option_ids = {option.id for option in question.options or []}
+    if not isinstance(data, list) or not data or not all(_is_int(item) for item in data):
+        return "Expected a non-empty list of option ids"
+    if len(set(data)) != len(data):
+        return "Option ids must not repeat"
+    unknown = [item for item in data if item not in option_ids]
+    if unknown:
+        return f"Options {unknown} do not belong to question {question.id}"
+    return None
+
+
+def _check_matrix(question: QuestionRead, data: Any, many: bool) -> Optional[str]:
+    rows = set(question.matrix_rows or [])
+    cols = set(question.matrix_cols or [])
+    if not isinstance(data, dict) or not data:
+        return "Expected an object mapping matrix rows to columns"
+    for row, selected in data.items():
+        if row not in rows:
+            return f"Unknown matrix row '{row}'"
+        if many:
+            # Only strings can be columns; anything else would break the set/membership checks
+            if not isinstance(selected, list) or not selected or not all(isinstance(col, str) for col in selected):
+                return f"Row '{row}' expects a non-empty list of columns"
+            if len(set(selected)) != len(selected):
+                return f"Row '{row}' repeats a column"
+            unknown = [col for col in selected if col not in cols]
+            if unknown:
+                return f"Unknown matrix columns {unknown} in row '{row}'"
+        elif not isinstance(selected, str):
+            return f"Row '{row}' expects a single column"
+        elif selected not in cols:
+            return f"Unknown matrix column '{selected}' in row '{row}'"
+    return None
+
+
+def _check_open_text(question: QuestionRead, data: Any) -> Optional[str]:
+    if not isinstance(data, str) or not data.strip():
+        return "Expected non-empty text"
+    if len(data) > MAX_OPEN_TEXT_LENGTH:
+        return f"Text must be at most {MAX_OPEN_TEXT_LENGTH} characters"
+    return None
+
+
+def validate_answer(question: QuestionRead, data: Any) -> Optional[str]:
+    """Return an error message if `data` is not a valid answer to `question`, else None."""
+    if question.type == QuestionType.SINGLE_CHOICE:
+        return _check_single_choice(question, data)
+    if question.type == QuestionType.MULTIPLE_CHOICE:
+        return _check_multiple_choice(question, data)
+    if question.type == QuestionType.MATRIX_ONE:
+        return _check_matrix(question, data, many=False)
+    if question.type == QuestionType.MATRIX_ANY:
+        return _check_matrix(question, data, many=True)
+    return _check_open_text(question, data)
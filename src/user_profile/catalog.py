@@ -0,0 +1,124 @@
+"""
+Versioned, pre-serialized cache of the question catalog.
+
+The questionnaire changes rarely but is read on every `/question/list` call, so
+the encoded JSON is kept in memory under a version number. Writes bump the
+version after commit and the next read rebuilds the snapshot. The TTL bounds
+staleness for writes made by other worker processes.
+
+A snapshot is built either from ORM rows or from JSON that Postgres assembled
+itself; in the latter case the parsed questions are only materialized when
+something (answer validation) asks for them.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter
+
+from src.config.config import get_settings
+from src.user_profile.schemas import QuestionRead
+from src.utils.etag import etag_for_bytes
+
+
+_catalog_adapter = TypeAdapter(List[QuestionRead])
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    payload: bytes
+    etag: str
+    built_at: float
+    parsed: Optional[List[QuestionRead]] = field(default=None, repr=False, compare=False)
+
+    @cached_property
+    def questions(self) -> List[QuestionRead]:
+        if self.parsed is not None:
+            return self.parsed
+        return _catalog_adapter.validate_json(self.payload)
+
+    @cached_property
+    def by_id(self) -> Dict[int, QuestionRead]:
+        return {question.id: question for question in self.questions}
+
+
+class QuestionCatalogCache:
+    def __init__(self, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self._ttl = ttl
+        self.version = 0
+        self._clock = clock
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def ttl(self) -> float:
+        # Without an explicit TTL, read CACHE_CATALOG_TTL_SECONDS on first use
+        if self._ttl is None:
+            self._ttl = get_settings().cache.catalog_ttl_seconds
+        return self._ttl
+
+    def bump(self) -> None:
+        """Mark the current snapshot stale."""
+        self.version += 1
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        snapshot = self._snapshot
+        if (
+            snapshot is None
+            or snapshot.version != self.version
+            or snapshot.built_at + self.ttl <= self._clock()
+        ):
+            return None
+        return snapshot
+
+    async def get_or_build(
+        self,
+        loader: Callable[[], Awaitable[Sequence[object]]]
+    ) -> CatalogSnapshot:
+        """Return the current snapshot, rebuilding it from the ORM rows `loader` returns if stale."""
+        async def build() -> Tuple[bytes, Optional[List[QuestionRead]]]:
+            questions = _catalog_adapter.validate_python(await loader(), from_attributes=True)
+            return _catalog_adapter.dump_json(questions), questions
+
+        return await self._get_or_build(build)
+
+    async def get_or_build_encoded(
+        self,
+        loader: Callable[[], Awaitable[bytes]]
+    ) -> CatalogSnapshot:
+        """Return the current snapshot, rebuilding it from the JSON bytes `loader` returns if stale."""
+        async def build() -> Tuple[bytes, Optional[List[QuestionRead]]]:
+            return await loader(), None
+
+        return await self._get_or_build(build)
+
+    async def _get_or_build(
+        self,
+        build: Callable[[], Awaitable[Tuple[bytes, Optional[List[QuestionRead]]]]]
+    ) -> CatalogSnapshot:
+        snapshot = self.current()
+        if snapshot is not None:
+            return snapshot
+        async with self._lock:
+            # Another request may have rebuilt it while we waited
+            snapshot = self.current()
+            if snapshot is not None:
+                return snapshot
+            version = self.version
+            payload, questions = await build()
+            snapshot = CatalogSnapshot(
+                version=version,
+                payload=payload,
+                etag=etag_for_bytes(payload),
+                built_at=self._clock(),
+                parsed=questions
+            )
+            # A bump during the load leaves this snapshot stale on the next read
+            self._snapshot = snapshot
+            return snapshot
+
+question_catalog = QuestionCatalogCache()
@@ -1,13 +1,21 @@
-from typing import List
-from fastapi import APIRouter, Depends, status
-from src.dependency.question_service import get_question_service
-from src.dependency.user_service import get_user_service
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from src.config.config import get_settings
+from src.database.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.dependency.question_service import get_question_read_service, get_question_service, get_question_stream_service
+from src.dependency.user_service import get_user_read_service, get_user_service, get_user_stream_service
 from src.user_profile.service import QuestionService, UserService
-from src.user_profile.schemas import QuestionCreate, QuestionRead, UserCreate, UserRead
+from src.user_profile.schemas import AnswerSubmit, AnswerSubmitResponse, Page, QuestionCreate, QuestionImportResponse, QuestionRead, QuestionResults, UserBulkCreateResponse, UserCreate, UserRead
+from src.user_profile.live_results import results_broadcaster
+from src.utils.etag import etag_matches, make_etag, not_modified
 from src.utils.logger import controller_logger
+from src.utils.request_timing import TimedRoute
+from src.utils.streaming import EXPORT_MEDIA_TYPES, NDJSON_MEDIA_TYPE, attachment_headers, ndjson_stream
 
 
-USER_SERVICE = APIRouter()
+USER_SERVICE = APIRouter(route_class=TimedRoute)
 
 
 @USER_SERVICE.post("/create", response_model=UserRead, tags=["User"], status_code=status.HTTP_201_CREATED)
@@ -16,49 +24,194 @@ async def create_user(
     service: UserService = Depends(get_user_service)
 ):
     """Create a new user."""
-    controller_logger.info(f"Creating user: {payload.email}")
+    controller_logger.info("Creating user: %s", payload.email)
     user = await service.create_user(payload)
-    controller_logger.info(f"User created with id: {user.id}")
+    controller_logger.info("User created with id: %s", user.id)
     return user
 
 
+@USER_SERVICE.post("/bulk-create", response_model=UserBulkCreateResponse, tags=["User"], status_code=status.HTTP_200_OK)
+async def bulk_create_users(
+    payload: List[Dict[str, Any]],
+    service: UserService = Depends(get_user_service)
+):
+    """Create many users at once; each item is validated and reported separately."""
+    controller_logger.info("Bulk creating %s users", len(payload))
+    result = await service.bulk_create_users(payload)
+    controller_logger.info("Bulk create finished: %s created, %s failed", result.created, result.failed)
+    return result
+
+
 @USER_SERVICE.post("/list", response_model=List[UserRead], tags=["User"], status_code=status.HTTP_200_OK)
 async def list_users(
-    service: UserService = Depends(get_user_service)
+    request: Request,
+    response: Response,
+    service: UserService = Depends(get_user_read_service)
 ):
-    """List all users."""
+    """List all users. Honours `If-None-Match` with a 304."""
     controller_logger.info("Listing all users")
+    etag = make_etag("users", await service.users_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
     users = await service.list_users()
-    controller_logger.info(f"Total users found: {len(users)}")
+    response.headers["ETag"] = etag
+    controller_logger.info("Total users found: %s", len(users))
     return users
 
+
+@USER_SERVICE.post("/list/stream", response_class=StreamingResponse, tags=["User"], status_code=status.HTTP_200_OK)
+async def stream_users(
+    service: UserService = Depends(get_user_stream_service)
+):
+    """Stream all users as NDJSON, one `UserRead` object per line."""
+    controller_logger.info("Streaming all users")
+    return StreamingResponse(ndjson_stream(service.stream_users(), UserRead), media_type=NDJSON_MEDIA_TYPE)
+
+
+@USER_SERVICE.post("/list/page", response_model=Page[UserRead], tags=["User"], status_code=status.HTTP_200_OK)
+async def list_users_page(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    service: UserService = Depends(get_user_read_service)
+):
+    """List users one page at a time using an opaque `next_cursor`."""
+    controller_logger.info("Listing users page (limit=%s)", limit)
+    etag = make_etag("users", await service.users_version(), limit, cursor)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    users, next_cursor = await service.list_users_page(limit=limit, cursor=cursor)
+    controller_logger.info("Users in page: %s", len(users))
+    return {"items": users, "next_cursor": next_cursor}
+
+
+@USER_SERVICE.post("/export", response_class=StreamingResponse, tags=["User"], status_code=status.HTTP_200_OK)
+async def export_users(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    service: UserService = Depends(get_user_read_service)
+):
+    """Export users created in `[created_from, created_to)` as CSV (with header) or NDJSON."""
+    controller_logger.info("Exporting users (%s)", format)
+    return StreamingResponse(
+        service.export_users(format, created_from=created_from, created_to=created_to),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=attachment_headers(f"users.{format}")
+    )
+
 @USER_SERVICE.post("/question/create", response_model=QuestionRead, tags=["Questions"], status_code=status.HTTP_201_CREATED)
 async def list_users(
     payload: QuestionCreate,
     service: QuestionService = Depends(get_question_service)
 ):
     """Create Question."""
-    controller_logger.info("Listing all users")
+    controller_logger.info("Creating question: %s", payload.text)
     que = await service.create_question(payload)
-    controller_logger.info(f"Total users found: {que}")
+    controller_logger.info("Question created with id: %s", que.id)
     return que
 
+@USER_SERVICE.post("/question/import", response_model=QuestionImportResponse, tags=["Questions"], status_code=status.HTTP_200_OK)
+async def import_questions(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    service: QuestionService = Depends(get_question_service)
+):
+    """
+    Import questions from a raw NDJSON or CSV request body.
+
+    The body is read incrementally; invalid lines are skipped and reported.
+    """
+    controller_logger.info("Importing questions (%s)", format)
+    result = await service.import_questions(request.stream(), format)
+    controller_logger.info("Question import finished: %s imported, %s failed", result.imported, result.failed)
+    return result
+
 @USER_SERVICE.post("/question/list", response_model=List[QuestionRead], tags=["Questions"], status_code=status.HTTP_200_OK)
 async def list_users(
+    request: Request,
     service: QuestionService = Depends(get_question_service)
 ):
-    """List Question."""
-    controller_logger.info("Listing all users")
-    que = await service.list_questions()
-    controller_logger.info(f"Total users found: {que}")
-    return que
+    """List Question. Honours `If-None-Match` with a 304."""
+    controller_logger.info("Listing all questions")
+    catalog = await service.get_catalog(source=get_settings().catalog.list_source)
+    if etag_matches(request, catalog.etag):
+        return not_modified(catalog.etag)
+    controller_logger.info("Serving question catalog version %s (%s bytes)", catalog.version, len(catalog.payload))
+    return Response(content=catalog.payload, media_type="application/json", headers={"ETag": catalog.etag})
+
+@USER_SERVICE.post("/question/list/stream", response_class=StreamingResponse, tags=["Questions"], status_code=status.HTTP_200_OK)
+async def stream_questions(
+    service: QuestionService = Depends(get_question_stream_service)
+):
+    """Stream all questions as NDJSON, one `QuestionRead` object per line."""
+    controller_logger.info("Streaming all questions")
+    return StreamingResponse(ndjson_stream(service.stream_questions(), QuestionRead), media_type=NDJSON_MEDIA_TYPE)
+
+@USER_SERVICE.post("/question/list/page", response_model=Page[QuestionRead], tags=["Questions"], status_code=status.HTTP_200_OK)
+async def list_questions_page(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    service: QuestionService = Depends(get_question_read_service)
+):
+    """List questions one page at a time using an opaque `next_cursor`."""
+    controller_logger.info("Listing questions page (limit=%s)", limit)
+    questions, next_cursor = await service.list_questions_page(limit=limit, cursor=cursor)
+    controller_logger.info("Questions in page: %s", len(questions))
+    return {"items": questions, "next_cursor": next_cursor}
+
+@USER_SERVICE.post("/question/answers/export", response_class=StreamingResponse, tags=["Questions"], status_code=status.HTTP_200_OK)
+async def export_answers(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    question_id: Optional[int] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    service: QuestionService = Depends(get_question_read_service)
+):
+    """Export answers as CSV (with header) or NDJSON, optionally for one question and `[created_from, created_to)`."""
+    controller_logger.info("Exporting answers (%s, question_id=%s)", format, question_id)
+    return StreamingResponse(
+        service.export_answers(format, question_id=question_id, created_from=created_from, created_to=created_to),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=attachment_headers(f"answers.{format}")
+    )
 
-@USER_SERVICE.post("/question/submit", response_model=List[QuestionRead], tags=["Questions"], status_code=status.HTTP_200_OK)
+@USER_SERVICE.post("/question/submit", response_model=AnswerSubmitResponse, tags=["Questions"], status_code=status.HTTP_201_CREATED)
 async def submit_answers(
+    payload: AnswerSubmit,
     service: QuestionService = Depends(get_question_service)
 ):
     """Submit Answers."""
-    controller_logger.info("Listing all users")
-    que = await service.list_questions()
-    controller_logger.info(f"Total users found: {que}")
-    return que
\ No newline at end of file
+    controller_logger.info("Submitting %s answers for user %s", len(payload.answers), payload.user_id)
+    result = await service.submit_answers(payload)
+    controller_logger.info("Answers accepted: %s", result.accepted)
+    return result
+
+
+@USER_SERVICE.get("/question/results/stream", response_class=StreamingResponse, tags=["Questions"], status_code=status.HTTP_200_OK)
+async def stream_question_results(
+    question_id: Optional[List[int]] = Query(None)
+):
+    """
+    Server-sent events with coalesced aggregate deltas (`event: delta`).
+
+    An `event: resync` means updates were dropped and results should be refetched.
+    """
+    controller_logger.info("Opening results stream")
+    return StreamingResponse(
+        results_broadcaster.subscribe(frozenset(question_id) if question_id else None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@USER_SERVICE.post("/question/{question_id}/results", response_model=QuestionResults, tags=["Questions"], status_code=status.HTTP_200_OK)
+async def question_results(
+    question_id: int,
+    service: QuestionService = Depends(get_question_service)
+):
+    """Live answer counts per option, matrix cell or response for one question."""
+    controller_logger.info("Fetching results for question %s", question_id)
+    return await service.get_results(question_id)
@@ -0,0 +1,242 @@
+"""
+Fan-out of live answer aggregate deltas to server-sent event subscribers.
+
+Ingestion publishes deltas after commit; they are merged into a pending map
+and broadcast once per `interval`. Each subscriber owns a mailbox that merges
+whatever it has not consumed yet, so a slow consumer receives one combined
+update instead of an ever-growing backlog. Memory per subscriber is bounded
+by the number of distinct buckets, not by how far behind it is.
+
+With fan-out running, each worker sends its coalesced deltas to every worker
+(itself included) with Postgres NOTIFY, so subscribers see all submissions
+whichever worker ingested them. Subscribers get `resync` after the listening
+connection is lost, as they may have missed deltas.
+"""
+
+import asyncio
+import json
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+import asyncpg
+from sqlalchemy.engine import URL
+
+from src.config.config import get_settings
+from src.utils.logger import service_logger
+
+
+NOTIFY_CHANNEL = "answer_aggregate_deltas"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_BYTES = 7900
+
+
+class _Subscriber:
+    def __init__(self, max_buckets: int, question_ids: Optional[FrozenSet[int]] = None):
+        self.max_buckets = max_buckets
+        self.question_ids = question_ids
+        self.pending: Counter = Counter()
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def offer(self, deltas: Counter) -> None:
+        if self.question_ids is not None:
+            deltas = Counter({key: delta for key, delta in deltas.items() if key[0] in self.question_ids})
+            if not deltas:
+                return
+        self.pending.update(deltas)
+        if len(self.pending) > self.max_buckets:
+            # Too far behind: drop the detail and tell the client to refetch
+            self.resync()
+        self.ready.set()
+
+    def resync(self) -> None:
+        self.pending.clear()
+        self.overflowed = True
+        self.ready.set()
+
+    def take(self) -> Tuple[Counter, bool]:
+        pending, overflowed = self.pending, self.overflowed
+        self.pending, self.overflowed = Counter(), False
+        self.ready.clear()
+        return pending, overflowed
+
+
+def encode_deltas(deltas: Counter) -> str:
+    """`{question_id: {bucket: delta}}` as compact JSON."""
+    grouped: Dict[str, Dict[str, int]] = {}
+    for (question_id, bucket), delta in deltas.items():
+        grouped.setdefault(str(question_id), {})[bucket] = delta
+    return json.dumps(grouped, separators=(",", ":"))
+
+
+def decode_deltas(payload: str) -> Counter:
+    return Counter({
+        (int(question_id), bucket): delta
+        for question_id, buckets in json.loads(payload).items()
+        for bucket, delta in buckets.items()
+    })
+
+
+def notify_payloads(deltas: Counter) -> List[str]:
+    """`deltas` encoded into as few payloads as fit in one NOTIFY each."""
+    payload = encode_deltas(deltas)
+    if len(payload.encode()) < MAX_NOTIFY_BYTES or len(deltas) == 1:
+        return [payload]
+    items = list(deltas.items())
+    half = len(items) // 2
+    return notify_payloads(Counter(dict(items[:half]))) + notify_payloads(Counter(dict(items[half:])))
+
+
+class AggregateBroadcaster:
+    def __init__(self, interval: float = 0.5, heartbeat: float = 15.0, max_buckets: int = 10000):
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.max_buckets = max_buckets
+        self._pending: Counter = Counter()
+        self._subscribers: Set[_Subscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+        # Fan-out across workers: deltas waiting to be sent and the listening connection
+        self._outgoing: Counter = Counter()
+        self._send_task: Optional[asyncio.Task] = None
+        self._fan_out_task: Optional[asyncio.Task] = None
+        self._connection: Optional[asyncpg.Connection] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def fanning_out(self) -> bool:
+        return self._connection is not None
+
+    def publish(self, deltas: Counter) -> None:
+        """Queue committed deltas for the next broadcast, to every worker while fanning out. Never blocks."""
+        if not self.fanning_out:
+            self._deliver(deltas)
+            return
+        self._outgoing.update(deltas)
+        if self._send_task is None or self._send_task.done():
+            self._send_task = asyncio.get_running_loop().create_task(self._send_later())
+
+    def _deliver(self, deltas: Counter) -> None:
+        if not self._subscribers:
+            return
+        self._pending.update(deltas)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._broadcast_later())
+
+    async def _broadcast_later(self) -> None:
+        # Coalesce everything published during one interval into one update
+        await asyncio.sleep(self.interval)
+        deltas, self._pending = self._pending, Counter()
+        self._offer(deltas)
+
+    def _offer(self, deltas: Counter) -> None:
+        for subscriber in self._subscribers:
+            subscriber.offer(deltas)
+
+    def _resync(self) -> None:
+        for subscriber in self._subscribers:
+            subscriber.resync()
+
+    async def _send_later(self) -> None:
+        # One NOTIFY round trip per interval, however many submissions committed
+        while self._outgoing:
+            await asyncio.sleep(self.interval)
+            deltas, self._outgoing = self._outgoing, Counter()
+            connection = self._connection
+            if connection is None:
+                self._offer(deltas)
+                continue
+            try:
+                # One statement, so the payloads are delivered together or not at all
+                await connection.execute(
+                    "SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload",
+                    NOTIFY_CHANNEL, notify_payloads(deltas)
+                )
+            except Exception as e:
+                service_logger.warning("Could not fan out %s result deltas: %s", len(deltas), e)
+                self._resync()
+
+    def _on_notify(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        if self._subscribers:
+            self._offer(decode_deltas(payload))
+
+    def start_fan_out(self, connect: Callable[[], Awaitable[asyncpg.Connection]], retry_delay: float = 1.0) -> None:
+        """Share deltas with the other workers over a connection from `connect`, reconnecting as needed."""
+        if self._fan_out_task is None or self._fan_out_task.done():
+            self._fan_out_task = asyncio.create_task(self._listen(connect, retry_delay), name="results-fan-out")
+
+    async def stop_fan_out(self) -> None:
+        if self._fan_out_task is not None:
+            self._fan_out_task.cancel()
+            try:
+                await self._fan_out_task
+            except asyncio.CancelledError:
+                pass
+            self._fan_out_task = None
+
+    async def _listen(self, connect: Callable[[], Awaitable[asyncpg.Connection]], retry_delay: float) -> None:
+        while True:
+            try:
+                connection = await connect()
+            except Exception as e:
+                service_logger.warning("Results fan-out cannot connect, retrying in %ss: %s", retry_delay, e)
+                await asyncio.sleep(retry_delay)
+                continue
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            try:
+                await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                self._connection = connection
+                await lost.wait()
+                service_logger.warning("Results fan-out connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                service_logger.warning("Results fan-out cannot listen: %s", e)
+            finally:
+                self._connection = None
+                # Deltas from other workers may have been missed meanwhile
+                self._resync()
+                if not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(retry_delay)
+
+    async def subscribe(self, question_ids: Optional[FrozenSet[int]] = None) -> AsyncIterator[str]:
+        """Yield SSE-formatted messages until the client disconnects."""
+        subscriber = _Subscriber(self.max_buckets, question_ids)
+        self._subscribers.add(subscriber)
+        service_logger.info("Results subscriber connected (%s active)", len(self._subscribers))
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                deltas, overflowed = subscriber.take()
+                if overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                if deltas:
+                    yield f"event: delta\ndata: {encode_deltas(deltas)}\n\n"
+        finally:
+            self._subscribers.discard(subscriber)
+            service_logger.info("Results subscriber disconnected (%s active)", len(self._subscribers))
+
+
+results_broadcaster = AggregateBroadcaster()
+
+
+def start_results_fan_out(url: URL) -> None:
+    """Fan live result deltas out to every worker through the database at `url`."""
+    if not get_settings().results.fan_out:
+        return
+    connect_args = url.translate_connect_args(username="user")
+    results_broadcaster.start_fan_out(lambda: asyncpg.connect(**connect_args))
+    service_logger.info("Live results fan-out started")
+
+
+async def stop_results_fan_out() -> None:
+    await results_broadcaster.stop_fan_out()
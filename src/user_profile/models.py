@@ -1,7 +1,8 @@
 import enum
-from sqlalchemy import JSON, Column, ForeignKey, Integer, String, Boolean, DateTime, Text, UniqueConstraint, func,Enum
+from sqlalchemy import JSON, BigInteger, Column, ForeignKey, Index, Integer, String, Boolean, DateTime, Text, UniqueConstraint, func,Enum
 from sqlalchemy.dialects.postgresql import UUID
 from src.database.base import Base
+from src.database.table_version import versioned
 from datetime import datetime, timezone, timedelta
 import uuid
 from sqlalchemy.orm import relationship
@@ -19,7 +20,9 @@ def generate_uuid():
 class BaseModel(Base):
     """Base model with audit fields (created_at, updated_at, created_by, updated_by, is_deleted)"""
     __abstract__ = True
-    
+    # Fetch server-generated values with INSERT/UPDATE ... RETURNING instead of a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
     created_at = Column(DateTime(timezone=True), nullable=False, default=get_ist_now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, default=get_ist_now, onupdate=get_ist_now, server_default=func.now())
     created_by = Column(UUID(as_uuid=True), nullable=True)
@@ -29,6 +32,10 @@ class BaseModel(Base):
 
 class UserProfile(BaseModel):
     __tablename__ = "users_profile"
+    __table_args__ = (
+        # Backs keyset pagination ordered by (created_at, id)
+        Index("ix_users_profile_created_at_id", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
@@ -37,6 +44,10 @@ class UserProfile(BaseModel):
     status = Column(String(20), nullable=False, default="pending")
     username = Column(String, nullable=False)
 
+
+# Backs BaseRepository.table_version for the /user/list ETags
+versioned(UserProfile.__table__)
+
 class QuestionType(str, enum.Enum):
     SINGLE_CHOICE = "single_choice"
     MULTIPLE_CHOICE = "multiple_choice"
@@ -46,13 +57,16 @@ class QuestionType(str, enum.Enum):
 
 class Question(BaseModel):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
     type = Column(Enum(QuestionType), nullable=False)
     que_order = Column(Integer, nullable=False)
     # Relationship to options (empty for open_text)
-    options = relationship("QuestionOption", back_populates="question", cascade="all, delete-orphan",lazy="selectin")
+    options = relationship("QuestionOption", back_populates="question", cascade="all, delete-orphan",lazy="selectin", order_by="QuestionOption.id")
 
     # # For matrix questions, rows and columns
     matrix_rows = Column(JSON, nullable=True)
@@ -81,3 +95,18 @@ class UserAnswer(BaseModel):
     answer_data = Column(JSON, nullable=False)
 
     question = relationship("Question")
+
+
+class AnswerAggregate(Base):
+    """
+    Running answer counts per question, maintained as answers are written.
+
+    `bucket` is "responses" for the total, "option:<id>" for choice questions
+    and "cell:<json [row, col]>" for matrix questions.
+    """
+    __tablename__ = "answer_aggregates"
+
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=get_ist_now, onupdate=get_ist_now, server_default=func.now())
@@ -0,0 +1,116 @@
+"""
+Incremental parsing of question import files.
+
+The request body is consumed chunk by chunk and turned into
+`(line_number, QuestionCreate | error)` pairs, so an import never holds more
+than one line of the file in memory.
+
+CSV files need a header row with `text,type,que_order,options,matrix_rows,matrix_cols`;
+list columns are separated by `|`. Quoted fields may not span lines.
+"""
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError as PydanticValidationError
+
+from src.exceptions import ValidationError
+from src.user_profile.schemas import QuestionCreate
+
+
+CSV_LIST_SEPARATOR = "|"
+
+ParsedLine = Tuple[int, Union[QuestionCreate, str]]
+
+
+def question_payload_error(payload: QuestionCreate) -> Optional[str]:
+    """Business rules on top of the `QuestionCreate` schema; None when valid."""
+    if payload.type == "single_choice" or payload.type == "multiple_choice":
+        if not payload.options or len(payload.options) < 2:
+            return "At least two options are required for choice questions."
+    return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a byte stream into decoded lines without buffering the whole body.
+
+    Raises `ValidationError` when the body is not valid UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    remainder = ""
+    line_number = 0
+
+    def decode(chunk: bytes, final: bool = False) -> str:
+        try:
+            return decoder.decode(chunk, final=final)
+        except UnicodeDecodeError as e:
+            newlines = remainder.count("\n") + chunk[:e.start].count(b"\n")
+            raise ValidationError("Request body is not valid UTF-8", details={"line": line_number + newlines + 1})
+
+    async for chunk in chunks:
+        remainder += decode(chunk)
+        *lines, remainder = remainder.split("\n")
+        for line in lines:
+            line_number += 1
+            yield line.rstrip("\r")
+    remainder += decode(b"", final=True)
+    if remainder:
+        yield remainder.rstrip("\r")
+
+
+def _split_list(value: str) -> Optional[List[str]]:
+    items = [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+    return items or None
+
+
+def _csv_record(header: List[str], line: str) -> dict:
+    values = next(csv.reader([line]))
+    if len(values) != len(header):
+        raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+    record = dict(zip(header, values))
+    options = _split_list(record.get("options", ""))
+    return {
+        "text": record.get("text"),
+        "type": record.get("type"),
+        "que_order": record.get("que_order"),
+        "options": [{"text": option} for option in options] if options else None,
+        "matrix_rows": _split_list(record.get("matrix_rows", "")),
+        "matrix_cols": _split_list(record.get("matrix_cols", "")),
+    }
+
+
+def _validation_message(error: PydanticValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'body'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+async def parse_questions(lines: AsyncIterator[str], file_format: str) -> AsyncIterator[ParsedLine]:
+    """Yield each non-blank line as a validated `QuestionCreate` or an error message."""
+    header: Optional[List[str]] = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            if file_format == "csv":
+                if header is None:
+                    header = [column.strip() for column in next(csv.reader([line]))]
+                    continue
+                record = _csv_record(header, line)
+            else:
+                record = json.loads(line)
+            payload = QuestionCreate.model_validate(record)
+        except PydanticValidationError as e:
+            yield line_number, _validation_message(e)
+            continue
+        except (ValueError, csv.Error) as e:
+            yield line_number, str(e)
+            continue
+        error = question_payload_error(payload)
+        yield line_number, error if error else payload
@@ -1,12 +1,165 @@
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple
+from sqlalchemy import String, cast, delete, func, insert, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.base_repository import BaseRepository
-from src.user_profile.models import Question, UserProfile
+from src.user_profile.models import AnswerAggregate, Question, QuestionOption, UserAnswer, UserProfile
+
+
+def _export_query(table: str, columns: str, conditions: Mapping[str, Optional[object]]) -> Tuple[str, list]:
+    """`SELECT columns FROM table` restricted by the non-None `{"expr op": value}` conditions."""
+    clauses = []
+    args = []
+    for expression, value in conditions.items():
+        if value is None:
+            continue
+        args.append(value)
+        clauses.append(f"{expression} ${len(args)}")
+    query = f"SELECT {columns} FROM {table}"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    return query, args
 
 
 class UserRepository(BaseRepository[UserProfile]):
+    cache_name = "users_profile"
+    export_columns = "id, name, email, domain, status, username, created_at, updated_at"
+
     def __init__(self, session: AsyncSession):
         super().__init__(UserProfile, session)
 
+    def export(
+        self,
+        format: str = "csv",
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        query, args = _export_query(
+            UserProfile.__tablename__,
+            self.export_columns,
+            {"created_at >=": created_from, "created_at <": created_to}
+        )
+        return self.copy_query(query, *args, format=format)
+
 class QuestionRepository(BaseRepository[Question]):
+    cache_name = "questions"
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(Question, session)
+
+    async def add_many_with_options(
+        self,
+        questions: List[dict],
+        options: List[List[str]]
+    ) -> List[int]:
+        """
+        Insert `questions` and their option texts with two set-based statements.
+
+        `options[i]` belongs to `questions[i]`. Returns the new question ids in order.
+        """
+        stmt = insert(Question).returning(Question.id, sort_by_parameter_order=True)
+        question_ids = list((await self.session.scalars(stmt, questions)).all())
+        option_rows = [
+            {"question_id": question_id, "text": text}
+            for question_id, texts in zip(question_ids, options)
+            for text in texts
+        ]
+        if option_rows:
+            await self.session.execute(insert(QuestionOption), option_rows)
+        return question_ids
+
+    async def list_catalog(self) -> Sequence[Question]:
+        """All questions with their options, in catalog order: `que_order`, then id."""
+        stmt = select(Question).order_by(Question.que_order, Question.id)
+        return (await self.session.scalars(stmt)).all()
+
+    async def catalog_json(self) -> bytes:
+        """
+        All questions with their options as a `List[QuestionRead]` JSON array built by Postgres.
+
+        Questions are ordered by `que_order` and options by id; one round trip,
+        no ORM objects.
+        """
+        empty_array = literal_column("'[]'::json")
+        # Aggregated in one grouped pass rather than a correlated subquery per question
+        option_lists = (
+            select(
+                QuestionOption.question_id,
+                func.json_agg(aggregate_order_by(
+                    func.json_build_object("id", QuestionOption.id, "text", QuestionOption.text),
+                    QuestionOption.id
+                )).label("options")
+            )
+            .group_by(QuestionOption.question_id)
+            .subquery()
+        )
+        question = func.json_build_object(
+            "id", Question.id,
+            "que_order", Question.que_order,
+            "text", Question.text,
+            # The enum is stored by member name
+            "type", func.lower(cast(Question.type, String)),
+            "options", func.coalesce(option_lists.c.options, empty_array),
+            "matrix_rows", Question.matrix_rows,
+            "matrix_cols", Question.matrix_cols
+        )
+        stmt = select(cast(
+            func.coalesce(func.json_agg(aggregate_order_by(question, Question.que_order, Question.id)), empty_array),
+            String
+        )).select_from(Question).outerjoin(option_lists, option_lists.c.question_id == Question.id)
+        payload = (await self.session.execute(stmt)).scalar_one()
+        return payload.encode()
+
+class UserAnswerRepository(BaseRepository[UserAnswer]):
+    export_columns = "id, user_id, question_id, answer_data, created_at"
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(UserAnswer, session)
+
+    def export(
+        self,
+        format: str = "csv",
+        question_id: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        query, args = _export_query(
+            UserAnswer.__tablename__,
+            self.export_columns,
+            {"question_id =": question_id, "created_at >=": created_from, "created_at <": created_to}
+        )
+        return self.copy_query(query, *args, format=format)
+
+class AnswerAggregateRepository(BaseRepository[AnswerAggregate]):
+    # Three bind parameters per row keeps each statement well under asyncpg's limit
+    chunk_size = 5000
+
     def __init__(self, session: AsyncSession):
-        super().__init__(Question, session)
\ No newline at end of file
+        super().__init__(AnswerAggregate, session)
+
+    async def increment(self, deltas: Mapping[Tuple[int, str], int]) -> None:
+        """Add `deltas` to the stored counts with one upsert per chunk."""
+        # Sorted so concurrent writers lock rows in the same order
+        rows = [
+            {"question_id": question_id, "bucket": bucket, "count": count}
+            for (question_id, bucket), count in sorted(deltas.items())
+        ]
+        for start in range(0, len(rows), self.chunk_size):
+            stmt = pg_insert(AnswerAggregate).values(rows[start:start + self.chunk_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AnswerAggregate.question_id, AnswerAggregate.bucket],
+                set_={"count": AnswerAggregate.count + stmt.excluded.count, "updated_at": func.now()}
+            )
+            await self.session.execute(stmt)
+
+    async def for_question(self, question_id: int) -> Dict[str, int]:
+        stmt = select(AnswerAggregate.bucket, AnswerAggregate.count).where(
+            AnswerAggregate.question_id == question_id
+        )
+        result = await self.session.execute(stmt)
+        return dict(result.all())
+
+    async def replace_all(self, totals: Mapping[Tuple[int, str], int]) -> None:
+        await self.session.execute(delete(AnswerAggregate))
+        await self.increment(totals)
@@ -1,6 +1,6 @@
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import List, Optional
+from typing import Any, Dict, Generic, List, Optional, TypeVar
 from enum import Enum
 
 class UserCreate(BaseModel):
@@ -19,6 +19,27 @@ class UserRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserBulkItemResult(BaseModel):
+    index: int
+    success: bool
+    user: Optional[UserRead] = None
+    errors: Optional[Dict[str, str]] = None
+
+
+class UserBulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[UserBulkItemResult]
+
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: List[ItemT]
+    next_cursor: Optional[str] = None  # None on the last page
+
+
 class QuestionType(str, Enum):
     SINGLE_CHOICE = "single_choice"
     MULTIPLE_CHOICE = "multiple_choice"
@@ -51,4 +72,47 @@ class QuestionRead(BaseModel):
     options: Optional[List[OptionRead]] = None  # For single/multiple choice
     matrix_rows: Optional[List[str]] = None       # For matrix questions
     matrix_cols: Optional[List[str]] = None 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AnswerItem(BaseModel):
+    question_id: int
+    # Shape depends on the question type:
+    # option id, list of option ids, {row: col}, {row: [cols]} or text
+    answer_data: Any
+
+
+class AnswerSubmit(BaseModel):
+    user_id: int
+    answers: List[AnswerItem] = Field(..., min_length=1, max_length=500)
+
+
+class AnswerSubmitResponse(BaseModel):
+    user_id: int
+    accepted: int
+
+
+class OptionCount(BaseModel):
+    option_id: int
+    text: str
+    count: int
+
+
+class QuestionResults(BaseModel):
+    question_id: int
+    type: QuestionType
+    responses: int
+    options: Optional[List[OptionCount]] = None           # For single/multiple choice
+    matrix: Optional[Dict[str, Dict[str, int]]] = None    # row -> column -> count
+
+
+class QuestionImportError(BaseModel):
+    line: int
+    error: str
+
+
+class QuestionImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[QuestionImportError]  # First errors only, see errors_truncated
+    errors_truncated: bool = False
@@ -1,11 +1,27 @@
-from typing import List
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.user_profile.repository import QuestionRepository, UserRepository
+from src.user_profile.repository import AnswerAggregateRepository, QuestionRepository, UserAnswerRepository, UserRepository
 from src.user_profile.models import Question, QuestionOption, UserProfile
-from src.user_profile.schemas import QuestionCreate, UserCreate
+from src.database.session_hooks import run_after_commit
+from src.exceptions import ResourceNotFoundError, ValidationError
+from src.user_profile.aggregation import RESPONSES_BUCKET, count_answers, option_bucket, parse_cell_bucket
+from src.user_profile.answer_buffer import get_answer_buffer
+from src.user_profile.answer_validation import validate_answer
+from src.user_profile.catalog import CatalogSnapshot, question_catalog
+from src.user_profile.live_results import results_broadcaster
+from src.user_profile.question_import import iter_lines, parse_questions, question_payload_error
+from src.user_profile.schemas import AnswerSubmit, AnswerSubmitResponse, OptionCount, QuestionCreate, QuestionImportError, QuestionImportResponse, QuestionResults, QuestionType, UserBulkCreateResponse, UserBulkItemResult, UserCreate, UserRead
 from src.utils.logger import service_logger
 
 
+MAX_BULK_CREATE = 10_000
+IMPORT_CHUNK_SIZE = 500
+MAX_IMPORT_ERRORS = 100
+
+
 class UserService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -13,30 +29,93 @@ class UserService:
 
     async def create_user(self, payload: UserCreate) -> UserProfile:
         """Create a new user."""
-        service_logger.info(f"Creating user: {payload.email}")
+        service_logger.info("Creating user: %s", payload.email)
         user = UserProfile(**payload.model_dump())
         created_user = await self.repo.add(user)
-        service_logger.info(f"User created with id: {created_user.id}")
+        service_logger.info("User created with id: %s", created_user.id)
         return created_user
     
-    async def list_users(self) -> List[UserProfile]:
-        """List all users."""
+    async def bulk_create_users(self, items: List[Dict[str, Any]]) -> UserBulkCreateResponse:
+        """Validate each item independently and insert the valid ones in bulk."""
+        if len(items) > MAX_BULK_CREATE:
+            raise ValidationError(
+                f"At most {MAX_BULK_CREATE} users can be created per request",
+                details={"received": len(items), "max": MAX_BULK_CREATE}
+            )
+        service_logger.info("Bulk creating %s users", len(items))
+        results: List[UserBulkItemResult] = []
+        valid_rows: List[dict] = []
+        valid_indexes: List[int] = []
+        for index, item in enumerate(items):
+            try:
+                payload = UserCreate.model_validate(item)
+            except PydanticValidationError as e:
+                errors = {
+                    str(error["loc"][-1]) if error["loc"] else "body": error["msg"]
+                    for error in e.errors()
+                }
+                results.append(UserBulkItemResult(index=index, success=False, errors=errors))
+                continue
+            valid_rows.append(payload.model_dump())
+            valid_indexes.append(index)
+
+        created = await self.repo.add_many(valid_rows)
+        for index, user in zip(valid_indexes, created):
+            results.append(UserBulkItemResult(index=index, success=True, user=UserRead.model_validate(user)))
+        results.sort(key=lambda r: r.index)
+        service_logger.info("Bulk created %s users, %s failed", len(created), len(items) - len(created))
+        return UserBulkCreateResponse(
+            created=len(created),
+            failed=len(items) - len(created),
+            results=results
+        )
+
+    async def list_users(self) -> Sequence[Row]:
+        """List all users, selecting only the columns `UserRead` needs."""
         service_logger.info("Listing all users")
-        users = await self.repo.list_by()
-        service_logger.info(f"Total users found: {len(users)}")
+        users = await self.repo.list_by(projection=UserRead)
+        service_logger.info("Total users found: %s", len(users))
         return users
+
+    async def users_version(self) -> int:
+        """Return a marker that changes whenever the users table does."""
+        return await self.repo.table_version()
+
+    def stream_users(self) -> AsyncIterator[Sequence[Row]]:
+        """Stream all users in batches, newest first."""
+        service_logger.info("Streaming all users")
+        return self.repo.stream_by(projection=UserRead)
+
+    async def list_users_page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[Sequence[Row], Optional[str]]:
+        """List one page of users, newest first."""
+        service_logger.info("Listing users page (limit=%s)", limit)
+        return await self.repo.list_page(limit=limit, cursor=cursor, projection=UserRead)
+
+    def export_users(
+        self,
+        file_format: str,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream users created in `[created_from, created_to)` straight from COPY."""
+        service_logger.info("Exporting users as %s", file_format)
+        return self.repo.export(file_format, created_from=created_from, created_to=created_to)
     
 class QuestionService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.repo = QuestionRepository(session)
+        self.answer_repo = UserAnswerRepository(session)
+        self.aggregate_repo = AnswerAggregateRepository(session)
 
     async def create_question(self, payload: QuestionCreate) -> QuestionCreate:
         """Create a new question."""
-        service_logger.info(f"Creating question: {payload.text}")
-        if payload.type == "single_choice" or payload.type == "multiple_choice":
-            if not payload.options or len(payload.options) < 2:
-                raise ValueError("At least two options are required for choice questions.")
+        service_logger.info("Creating question: %s", payload.text)
+        error = question_payload_error(payload)
+        if error:
+            raise ValueError(error)
         question = Question(
             text=payload.text,
             type=payload.type,
@@ -46,19 +125,180 @@ class QuestionService:
             matrix_cols=payload.matrix_cols
         )
         created_question = await self.repo.add(question)
-        service_logger.info(f"Question created with id: {created_question.id}")
+        run_after_commit(self.session, question_catalog.bump)
+        service_logger.info("Question created with id: %s", created_question.id)
         return created_question
     
+    async def import_questions(
+        self,
+        chunks: AsyncIterator[bytes],
+        file_format: str
+    ) -> QuestionImportResponse:
+        """
+        Import questions from an NDJSON or CSV byte stream.
+
+        Valid lines are inserted `IMPORT_CHUNK_SIZE` at a time with two
+        statements per chunk; invalid lines are skipped and reported.
+        """
+        service_logger.info("Importing questions from %s", file_format)
+        imported = 0
+        failed = 0
+        errors: List[QuestionImportError] = []
+        chunk: List[QuestionCreate] = []
+
+        async def flush() -> int:
+            question_ids = await self.repo.add_many_with_options(
+                [
+                    {
+                        "text": payload.text,
+                        "type": payload.type,
+                        "que_order": payload.que_order,
+                        "matrix_rows": payload.matrix_rows,
+                        "matrix_cols": payload.matrix_cols,
+                    }
+                    for payload in chunk
+                ],
+                [[option.text for option in payload.options or []] for payload in chunk]
+            )
+            chunk.clear()
+            return len(question_ids)
+
+        async for line_number, parsed in parse_questions(iter_lines(chunks), file_format):
+            if isinstance(parsed, str):
+                failed += 1
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append(QuestionImportError(line=line_number, error=parsed))
+                continue
+            chunk.append(parsed)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                imported += await flush()
+        if chunk:
+            imported += await flush()
+
+        if imported:
+            run_after_commit(self.session, question_catalog.bump)
+        service_logger.info("Imported %s questions, %s lines rejected", imported, failed)
+        return QuestionImportResponse(
+            imported=imported,
+            failed=failed,
+            errors=errors,
+            errors_truncated=failed > len(errors)
+        )
+
     async def list_questions(self) -> List[Question]:
         """List all questions."""
         service_logger.info("Listing all questions")
         questions = await self.repo.list_by()
-        service_logger.info(f"Total questions found: {len(questions)}")
+        service_logger.info("Total questions found: %s", len(questions))
         return questions
+
+    async def get_catalog(self, source: str = "orm") -> CatalogSnapshot:
+        """
+        Return the question catalog, pre-encoded as JSON.
+
+        With `source="database"` a stale catalog is rebuilt from JSON assembled
+        by Postgres instead of from ORM rows; both are ordered by `que_order`, id.
+        """
+        if source == "database":
+            snapshot = await question_catalog.get_or_build_encoded(self.repo.catalog_json)
+        else:
+            snapshot = await question_catalog.get_or_build(self.repo.list_catalog)
+        service_logger.info("Serving question catalog version %s", snapshot.version)
+        return snapshot
+
+    def stream_questions(self) -> AsyncIterator[Sequence[Question]]:
+        """Stream all questions in batches, newest first."""
+        service_logger.info("Streaming all questions")
+        return self.repo.stream_by()
+
+    async def list_questions_page(
+        self, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Question], Optional[str]]:
+        """List one page of questions, newest first."""
+        service_logger.info("Listing questions page (limit=%s)", limit)
+        return await self.repo.list_page(limit=limit, cursor=cursor)
+
+    def export_answers(
+        self,
+        file_format: str,
+        question_id: Optional[int] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream answers, optionally for one question and `[created_from, created_to)`, straight from COPY."""
+        service_logger.info("Exporting answers as %s (question_id=%s)", file_format, question_id)
+        return self.answer_repo.export(
+            file_format, question_id=question_id, created_from=created_from, created_to=created_to
+        )
     
-    async def submit_answers(self, answers: List[dict]) -> List[Question]:
-        """Submit user answers."""
-        service_logger.info("Submitting user answers")
-        # Implementation for submitting answers goes here
+    async def submit_answers(self, payload: AnswerSubmit) -> AnswerSubmitResponse:
+        """
+        Validate a submission against the cached catalog and store it in one INSERT.
+
+        The whole submission is rejected if any answer is invalid.
+        """
+        service_logger.info("Submitting %s answers for user %s", len(payload.answers), payload.user_id)
+        catalog = await self.get_catalog()
+        errors: Dict[str, str] = {}
+        seen = set()
+        for index, answer in enumerate(payload.answers):
+            question = catalog.by_id.get(answer.question_id)
+            if question is None:
+                errors[str(index)] = f"Question {answer.question_id} does not exist"
+            elif answer.question_id in seen:
+                errors[str(index)] = f"Question {answer.question_id} answered more than once"
+            else:
+                error = validate_answer(question, answer.answer_data)
+                if error:
+                    errors[str(index)] = error
+            seen.add(answer.question_id)
+        if errors:
+            raise ValidationError(
+                "One or more answers are invalid",
+                error_code="INVALID_ANSWER",
+                details={"answers": errors}
+            )
+        rows = [
+            {"user_id": payload.user_id, "question_id": answer.question_id, "answer_data": answer.answer_data}
+            for answer in payload.answers
+        ]
+        deltas = count_answers(
+            (answer.question_id, catalog.by_id[answer.question_id].type, answer.answer_data)
+            for answer in payload.answers
+        )
+        buffer = get_answer_buffer()
+        if buffer is not None:
+            await buffer.submit(rows, deltas)
+        else:
+            await self.answer_repo.add_many(rows)
+            await self.aggregate_repo.increment(deltas)
+            run_after_commit(self.session, lambda: results_broadcaster.publish(deltas))
         service_logger.info("User answers submitted successfully")
-        return []  # Return appropriate response
\ No newline at end of file
+        return AnswerSubmitResponse(user_id=payload.user_id, accepted=len(rows))
+
+    async def get_results(self, question_id: int) -> QuestionResults:
+        """Return live answer tallies for one question from the aggregate store."""
+        catalog = await self.get_catalog()
+        question = catalog.by_id.get(question_id)
+        if question is None:
+            raise ResourceNotFoundError("Question", question_id)
+        counts = await self.aggregate_repo.for_question(question_id)
+        results = QuestionResults(
+            question_id=question_id,
+            type=question.type,
+            responses=counts.get(RESPONSES_BUCKET, 0)
+        )
+        if question.type in (QuestionType.SINGLE_CHOICE, QuestionType.MULTIPLE_CHOICE):
+            results.options = [
+                OptionCount(option_id=option.id, text=option.text, count=counts.get(option_bucket(option.id), 0))
+                for option in question.options or []
+            ]
+        elif question.type in (QuestionType.MATRIX_ONE, QuestionType.MATRIX_ANY):
+            matrix = {row: {col: 0 for col in question.matrix_cols or []} for row in question.matrix_rows or []}
+            for bucket, count in counts.items():
+                if bucket.startswith("cell:"):
+                    row, col = parse_cell_bucket(bucket)
+                    if row in matrix and col in matrix[row]:
+                        matrix[row][col] = count
+            results.matrix = matrix
+        return results
@@ -0,0 +1,131 @@
+"""
+Cheap logging for per-request code paths.
+
+`HotPathLogger` wraps a logger and keeps the cost of a log call independent
+of what is being logged:
+
+* nothing is formatted unless the level is enabled and the record is kept;
+  pass values as %-style arguments instead of building f-strings;
+* DEBUG/INFO records can be sampled per call site (`LOG_SAMPLE_RATES`, keyed
+  by `module:function` or logger name), keeping every n-th record;
+* collection and long string arguments are wrapped in `summarize()`, so a
+  handler renders at most `LOG_SUMMARY_MAX_ITEMS` items / `LOG_SUMMARY_MAX_CHARS`
+  characters of them.
+"""
+
+import logging
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Mapping, Optional
+
+
+_SUMMARIZED_TYPES = (list, tuple, set, frozenset, dict)
+_SKIPPED_FILES = {__file__, logging.__file__}
+
+
+class _Summary:
+    """Renders a bounded view of `value` only when a handler formats the record."""
+
+    __slots__ = ("value", "max_items", "max_chars")
+
+    def __init__(self, value: Any, max_items: int, max_chars: int):
+        self.value = value
+        self.max_items = max_items
+        self.max_chars = max_chars
+
+    def _truncate(self, text: str) -> str:
+        if len(text) <= self.max_chars:
+            return text
+        return f"{text[:self.max_chars]}... ({len(text)} chars)"
+
+    def __str__(self) -> str:
+        value = self.value
+        if isinstance(value, str):
+            return self._truncate(value)
+        if not isinstance(value, _SUMMARIZED_TYPES):
+            return self._truncate(str(value))
+        items = value.items() if isinstance(value, dict) else value
+        shown = []
+        for index, item in enumerate(items):
+            if index == self.max_items:
+                break
+            shown.append(self._truncate(f"{item[0]!r}: {item[1]!r}" if isinstance(value, dict) else repr(item)))
+        more = ", ..." if len(value) > self.max_items else ""
+        return f"<{type(value).__name__} of {len(value)}: [{', '.join(shown)}{more}]>"
+
+    __repr__ = __str__
+
+
+def summarize(value: Any, max_items: int = 5, max_chars: int = 200) -> _Summary:
+    """Lazily summarize `value` for a log message: count plus the first `max_items` items."""
+    return _Summary(value, max_items, max_chars)
+
+
+def call_site() -> str:
+    """`module:function` of the nearest caller outside logging code."""
+    frame = sys._getframe(1)
+    while frame.f_back is not None and frame.f_code.co_filename in _SKIPPED_FILES:
+        frame = frame.f_back
+    return f"{frame.f_globals.get('__name__')}:{frame.f_code.co_name}"
+
+
+class HotPathLogger(logging.LoggerAdapter):
+    def __init__(
+        self,
+        logger: logging.Logger,
+        sample_rates: Optional[Mapping[str, float]] = None,
+        max_items: Optional[int] = None,
+        max_chars: Optional[int] = None
+    ):
+        super().__init__(logger, {})
+        self._sample_rates = sample_rates
+        self._max_items = max_items
+        self._max_chars = max_chars
+        self._counters: Dict[str, int] = defaultdict(int)
+
+    def _load_settings(self) -> None:
+        # Read on first use so that creating the logger stays side-effect free
+        from src.config.config import get_settings
+        config = get_settings().logging
+        if self._sample_rates is None:
+            self._sample_rates = config.sample_rates
+        if self._max_items is None:
+            self._max_items = config.summary_max_items
+        if self._max_chars is None:
+            self._max_chars = config.summary_max_chars
+
+    def _sample_rate(self, site: str) -> float:
+        rates = self._sample_rates
+        if site in rates:
+            return rates[site]
+        return rates.get(self.logger.name, 1.0)
+
+    def _keep(self, site: str, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        count = self._counters[site]
+        self._counters[site] = count + 1
+        return count % max(round(1 / rate), 1) == 0
+
+    def log(self, level: int, msg: Any, *args: Any, **kwargs: Any) -> None:
+        if not self.isEnabledFor(level):
+            return
+        if self._max_items is None:
+            self._load_settings()
+        if self._sample_rates and level < logging.WARNING:
+            site = call_site()
+            rate = self._sample_rate(site)
+            if rate < 1:
+                if not self._keep(site, rate):
+                    return
+                kwargs["extra"] = {**kwargs.get("extra", {}), "sample_rate": rate}
+        if args:
+            args = tuple(
+                summarize(arg, self._max_items, self._max_chars)
+                if isinstance(arg, _SUMMARIZED_TYPES) or (isinstance(arg, str) and len(arg) > self._max_chars)
+                else arg
+                for arg in args
+            )
+        # Attribute funcName/lineno to the caller rather than this adapter
+        kwargs.setdefault("stacklevel", 2)
+        self.logger.log(level, msg, *args, **kwargs)
@@ -1,58 +1,116 @@
 """
 Logging configuration for FastAPI application.
 
-Provides structured logging with both console and file handlers.
+Provides structured (text or JSON) logging with console and file handlers, written on a background thread.
 """
 
+import copy
 import logging
 import logging.handlers
 import os
+import queue
+import sys
+from contextvars import ContextVar
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import List, Optional
 
+import orjson
 
-def setup_logger(
-    name: str = "fastapi_app",
+from src.utils.hot_logging import HotPathLogger
+
+
+# Id of the request being served in this context (see src.utils.request_context)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id when they are created, not when written."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Records handed over by the queue were stamped in the logging thread
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "request_id"}
+
+
+def _encode_json(payload: dict) -> str:
+    return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: standard fields, `request_id` and every `extra` field."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return _encode_json(payload)
+
+
+def build_handlers(
     log_level: int = logging.INFO,
-    log_dir: str = "logs"
-) -> logging.Logger:
+    log_dir: str = "logs",
+    log_format: str = "text",
+    files: bool = True
+) -> List[logging.Handler]:
     """
-    Configure and return a logger with console and file handlers.
-    
-    Args:
-        name: Logger name
-        log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        log_dir: Directory to store log files
-        
-    Returns:
-        Configured logger instance
+    Console, full file and error file handlers; creates `log_dir` if needed.
+
+    Without `files`, a single stdout handler takes every level instead.
     """
-    # Create logs directory if it doesn't exist
-    Path(log_dir).mkdir(exist_ok=True)
-    
-    # Create logger
-    logger = logging.getLogger(name)
-    logger.setLevel(log_level)
-    
-    # Remove existing handlers to avoid duplicates
-    logger.handlers.clear()
-    
     # Create formatters
-    detailed_formatter = logging.Formatter(
-        fmt='%(asctime)s | %(name)s | %(levelname)-8s | %(funcName)s:%(lineno)d | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    simple_formatter = logging.Formatter(
-        fmt='%(asctime)s | %(levelname)-8s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if log_format == "json":
+        detailed_formatter = simple_formatter = JsonFormatter()
+    else:
+        detailed_formatter = logging.Formatter(
+            fmt='%(asctime)s | %(name)s | %(levelname)-8s | %(funcName)s:%(lineno)d | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        simple_formatter = logging.Formatter(
+            fmt='%(asctime)s | %(levelname)-8s | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     
+    if not files:
+        stdout_handler = logging.StreamHandler(sys.stdout)
+        stdout_handler.setLevel(log_level)
+        stdout_handler.setFormatter(detailed_formatter)
+        stdout_handler.addFilter(RequestIdFilter())
+        return [stdout_handler]
+
+    Path(log_dir).mkdir(exist_ok=True)
+
     # Console Handler (INFO level and above)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
-    logger.addHandler(console_handler)
     
     # File Handler - All levels
     log_file = os.path.join(log_dir, f"app_{datetime.now().strftime('%Y%m%d')}.log")
@@ -64,7 +122,6 @@ def setup_logger(
     )
     file_handler.setLevel(log_level)
     file_handler.setFormatter(detailed_formatter)
-    logger.addHandler(file_handler)
     
     # Error File Handler - ERROR and CRITICAL only
     error_log_file = os.path.join(log_dir, f"error_{datetime.now().strftime('%Y%m%d')}.log")
@@ -76,36 +133,270 @@ def setup_logger(
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(detailed_formatter)
-    logger.addHandler(error_handler)
+    
+    handlers = [console_handler, file_handler, error_handler]
+    for handler in handlers:
+        handler.addFilter(RequestIdFilter())
+    return handlers
+
+
+def setup_logger(
+    name: str = "fastapi_app",
+    log_level: int = logging.INFO,
+    log_dir: str = "logs"
+) -> logging.Logger:
+    """
+    Configure and return a logger with console and file handlers.
+    
+    Args:
+        name: Logger name
+        log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        log_dir: Directory to store log files
+        
+    Returns:
+        Configured logger instance
+    """
+    # Create logger
+    logger = logging.getLogger(name)
+    logger.setLevel(log_level)
+    
+    # Remove existing handlers to avoid duplicates
+    logger.handlers.clear()
+    
+    for handler in build_handlers(log_level, log_dir):
+        logger.addHandler(handler)
     
     return logger
 
 
-# Create application logger
-logger = setup_logger(
-    name="fastapi_app",
-    log_level=logging.INFO,
-    log_dir="logs"
-)
+# Application loggers; handlers are attached by configure_logging() at startup
+# so that importing this module touches neither the filesystem nor handlers.
+# Module loggers sample and summarize per LOG_* settings (see hot_logging).
+logger = logging.getLogger("fastapi_app")
+database_logger = HotPathLogger(logging.getLogger("fastapi_app.database"))
+service_logger = HotPathLogger(logging.getLogger("fastapi_app.service"))
+controller_logger = HotPathLogger(logging.getLogger("fastapi_app.controller"))
+# One record per request, with timings (see request_timing)
+access_logger = HotPathLogger(logging.getLogger("fastapi_app.access"))
+
+# Only the database logger defaults below the application level
+_DEBUG_LOGGERS = ("fastapi_app.database",)
+
+
+class RequestLogBatch:
+    """
+    Records logged while a request is handled, queued as a single item.
+
+    The batch is flushed early once it holds `max_records` or an ERROR record,
+    so memory stays bounded and failures are written promptly. Records logged
+    after `close()` (e.g. by tasks that outlive the request) bypass it.
+    """
+
+    def __init__(self, handler: "DroppingQueueHandler", max_records: int):
+        self.handler = handler
+        self.max_records = max_records
+        self.records: List[logging.LogRecord] = []
+        self.closed = False
+
+    def add(self, record: logging.LogRecord) -> bool:
+        if self.closed:
+            return False
+        self.records.append(record)
+        if record.levelno >= logging.ERROR or len(self.records) >= self.max_records:
+            self.flush()
+        return True
+
+    def flush(self) -> None:
+        if self.records:
+            records, self.records = self.records, []
+            self.handler.put(records)
+
+    def close(self) -> None:
+        self.closed = True
+        self.flush()
+
+
+_log_batch_var: ContextVar[Optional[RequestLogBatch]] = ContextVar("log_batch", default=None)
+
+
+# Tracebacks are rendered to text before records are queued
+_exception_formatter = logging.Formatter()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: records are dropped while the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.addFilter(RequestIdFilter())
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Render the message and traceback in the calling thread.
+
+        The arguments may be live objects that the event loop keeps changing
+        (or ORM instances that must not be touched from another thread), so
+        only the rendered text goes to the listener, which just formats the
+        line and writes it.
+        """
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.message = record.msg = message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-# Optional: Create separate loggers for different modules
-database_logger = setup_logger(
-    name="fastapi_app.database",
-    log_level=logging.DEBUG,
-    log_dir="logs"
-)
+    def enqueue(self, record: logging.LogRecord) -> None:
+        batch = _log_batch_var.get()
+        if batch is not None and batch.handler is self and batch.add(record):
+            return
+        self.put(record)
+
+    def put(self, item) -> None:
+        """Queue a record or a list of records, dropping it if the queue is full."""
+        try:
+            if self._unreported:
+                self.queue.put_nowait(self._drop_report())
+                self._unreported = 0
+            self.queue.put_nowait(item)
+        except queue.Full:
+            count = len(item) if isinstance(item, list) else 1
+            self.dropped += count
+            self._unreported += count
+
+    def _drop_report(self) -> logging.LogRecord:
+        return logging.LogRecord(
+            "fastapi_app", logging.WARNING, __file__, 0,
+            "Logging queue was full, dropped %d records", (self._unreported,), None
+        )
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def handle(self, record) -> None:
+        # A request's batch is written in one go, so its lines stay together
+        if isinstance(record, list):
+            for item in record:
+                super().handle(item)
+        else:
+            super().handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full when stopping; wait for the thread to make room
+        self.queue.put(self._sentinel)
+
+
+class _QueuePipeline:
+    def __init__(self, handlers: List[logging.Handler], maxsize: int):
+        self.handlers = handlers
+        self.maxsize = maxsize
+        self.queue_handler = DroppingQueueHandler(queue.Queue(maxsize))
+        self.listener = self._start_listener()
+
+    def _start_listener(self) -> logging.handlers.QueueListener:
+        listener = _QueueListener(
+            self.queue_handler.queue, *self.handlers, respect_handler_level=True
+        )
+        listener.start()
+        return listener
+
+    def restart_after_fork(self) -> None:
+        # The listener thread does not survive fork(); give the child its own
+        self.queue_handler.queue = queue.Queue(self.maxsize)
+        self.listener = self._start_listener()
+
+    def stop(self) -> None:
+        """Write out everything still queued and stop the listener thread."""
+        self.listener.stop()
+
+
+_pipeline: Optional[_QueuePipeline] = None
+_configured = False
+
+
+def _after_fork_in_child() -> None:
+    if _pipeline is not None:
+        _pipeline.restart_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def configure_logging(log_dir: Optional[str] = None) -> None:
+    """
+    Set up the application loggers once; later calls are no-ops.
+
+    Levels come from `APP_LOG_LEVEL`; `LOG_QUEUE_ENABLED`, `LOG_QUEUE_SIZE`,
+    `LOG_FILES`, `LOG_DIR` and `LOG_FORMAT` select the pipeline.
+    """
+    global _configured, _pipeline
+    if _configured:
+        return
+    from src.config.config import get_settings
+    settings = get_settings()
+    config = settings.logging
+    level = logging.getLevelName(settings.log_level.upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    # Levels are enforced by the loggers, so the file handler accepts everything
+    handlers = build_handlers(logging.DEBUG, log_dir or config.dir, config.format, config.files)
+    logger.handlers.clear()
+    if config.queue_enabled:
+        _pipeline = _QueuePipeline(handlers, config.queue_size)
+        logger.addHandler(_pipeline.queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    logger.setLevel(level)
+    for child in (database_logger.logger, service_logger.logger, controller_logger.logger, access_logger.logger):
+        child.handlers.clear()
+        child.propagate = True
+        child.setLevel(logging.DEBUG if child.name in _DEBUG_LOGGERS else level)
+    _configured = True
+
+
+def shutdown_logging() -> None:
+    """Flush queued records; logging stays usable and is written synchronously afterwards."""
+    global _pipeline
+    if _pipeline is None:
+        return
+    pipeline, _pipeline = _pipeline, None
+    pipeline.stop()
+    logger.removeHandler(pipeline.queue_handler)
+    for handler in pipeline.handlers:
+        logger.addHandler(handler)
+
+
+def start_log_batch() -> Optional[RequestLogBatch]:
+    """
+    Buffer the records logged in the current context until the batch is closed.
+
+    Returns None (nothing is buffered) unless records go through the logging
+    queue and `LOG_REQUEST_BATCH_SIZE` is positive.
+    """
+    if _pipeline is None:
+        return None
+    from src.config.config import get_settings
+    max_records = get_settings().logging.request_batch_size
+    if max_records <= 0:
+        return None
+    batch = RequestLogBatch(_pipeline.queue_handler, max_records)
+    _log_batch_var.set(batch)
+    return batch
 
-service_logger = setup_logger(
-    name="fastapi_app.service",
-    log_level=logging.INFO,
-    log_dir="logs"
-)
 
-controller_logger = setup_logger(
-    name="fastapi_app.controller",
-    log_level=logging.INFO,
-    log_dir="logs"
-)
+def dropped_records() -> int:
+    """Records dropped because the logging queue was full (this process)."""
+    return _pipeline.queue_handler.dropped if _pipeline is not None else 0
 
 
-__all__ = ["logger", "database_logger", "service_logger", "controller_logger", "setup_logger"]
+__all__ = [
+    "logger", "database_logger", "service_logger", "controller_logger", "access_logger",
+    "setup_logger", "configure_logging", "shutdown_logging", "dropped_records",
+    "JsonFormatter", "RequestIdFilter", "current_request_id", "start_log_batch"
+]
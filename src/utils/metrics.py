@@ -0,0 +1,202 @@
+"""Prometheus metrics for requests, database queries, errors, pools and caches, served at `/metrics`."""
+
+import functools
+import inspect
+import os
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from src.exceptions import ERROR_CODE_TO_STATUS
+
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve HTTP requests",
+    ["method", "route", "status"]
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being served",
+    multiprocess_mode="livesum"
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Time to execute database statements, by repository method",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+EXCEPTIONS = Counter(
+    "app_exceptions_total",
+    "Errors returned to clients, by error code",
+    ["error_code"]
+)
+for _error_code in ERROR_CODE_TO_STATUS:
+    EXCEPTIONS.labels(error_code=_error_code)
+
+# Label for statements run outside a repository method
+OTHER_OPERATION = "other"
+_db_operation: ContextVar[str] = ContextVar("db_operation", default=OTHER_OPERATION)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    REQUEST_DURATION.labels(method=method, route=route, status=status).observe(seconds)
+
+
+def observe_query(seconds: float) -> None:
+    DB_QUERY_DURATION.labels(operation=_db_operation.get()).observe(seconds)
+
+
+def count_exception(error_code: str) -> None:
+    EXCEPTIONS.labels(error_code=error_code).inc()
+
+
+def _labelled(operation: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.isasyncgenfunction(method):
+        # Only label while the generator runs: between items the caller's own
+        # queries must not be attributed to it
+        @functools.wraps(method)
+        async def labelled(*args: Any, **kwargs: Any):
+            generator = method(*args, **kwargs)
+            try:
+                while True:
+                    token = _db_operation.set(operation)
+                    try:
+                        item = await generator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        _db_operation.reset(token)
+                    yield item
+            finally:
+                await generator.aclose()
+    else:
+        @functools.wraps(method)
+        async def labelled(*args: Any, **kwargs: Any) -> Any:
+            token = _db_operation.set(operation)
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                _db_operation.reset(token)
+    labelled._unlabelled = method
+    return labelled
+
+
+def label_db_operations(cls: type) -> None:
+    """Label the queries run by each public async method of `cls` as "<class>.<method>"."""
+    for name in dir(cls):
+        if name.startswith("_"):
+            continue
+        attribute = getattr(cls, name)
+        # Inherited methods are already wrapped with the parent's name
+        method = getattr(attribute, "_unlabelled", attribute)
+        if inspect.iscoroutinefunction(method) or inspect.isasyncgenfunction(method):
+            setattr(cls, name, _labelled(f"{cls.__name__}.{name}", method))
+
+
+class _ScrapeTimeCollector(Collector):
+    """Pool and entity cache statistics of this process, read when scraped."""
+
+    def __init__(self, pid: Optional[int] = None):
+        self._labels: Dict[str, str] = {"pid": str(pid)} if pid is not None else {}
+
+    def _family(self, family: type, name: str, documentation: str, labels: tuple) -> Metric:
+        return family(name, documentation, labels=[*labels, *self._labels])
+
+    def describe(self) -> Iterator[Metric]:
+        # Registering must not create the database engines (the registry collects otherwise)
+        return iter(())
+
+    def collect(self) -> Iterator[Metric]:
+        yield from self._pool_metrics()
+        yield from self._cache_metrics()
+
+    def _pool_metrics(self) -> Iterator[Metric]:
+        from src.database.pool import pool_status
+        from src.database.postgres_conn import get_database
+
+        database = get_database()
+        pools = {"primary": database.engine.pool}
+        if database.replica_engine is not None:
+            pools["replica"] = database.replica_engine.pool
+        gauges = {
+            key: self._family(GaugeMetricFamily, f"db_pool_{key}", documentation, ("pool",))
+            for key, documentation in (
+                ("size", "Connections kept open by the pool"),
+                ("max_connections", "Connections the pool may open, overflow included"),
+                ("checked_out", "Connections in use"),
+                ("idle", "Connections open and available"),
+                ("overflow", "Connections open beyond the pool size"),
+                ("max_wait_seconds", "Longest wait for a connection"),
+            )
+        }
+        counters = {
+            key: self._family(CounterMetricFamily, f"db_pool_{key}", documentation, ("pool",))
+            for key, documentation in (
+                ("checkouts", "Connections handed out"),
+                ("timeouts", "Waits for a connection that timed out"),
+                ("wait_seconds", "Time spent waiting for connections"),
+            )
+        }
+        for pool_name, pool in pools.items():
+            status = pool_status(pool)
+            status["wait_seconds"] = status.get("total_wait_seconds")
+            labels = [pool_name, *self._labels.values()]
+            for key, family in {**gauges, **counters}.items():
+                if status.get(key) is not None:
+                    family.add_metric(labels, status[key])
+        yield from gauges.values()
+        yield from counters.values()
+
+    def _cache_metrics(self) -> Iterator[Metric]:
+        from src.database.cache import CACHE_REGISTRY
+
+        families = {
+            "hits": self._family(CounterMetricFamily, "entity_cache_hits", "Cache lookups served", ("cache",)),
+            "misses": self._family(CounterMetricFamily, "entity_cache_misses", "Cache lookups missed", ("cache",)),
+            "evictions": self._family(
+                CounterMetricFamily, "entity_cache_evictions", "Entries evicted to stay within maxsize", ("cache",)
+            ),
+            "size": self._family(GaugeMetricFamily, "entity_cache_size", "Entries cached", ("cache",)),
+            "hit_ratio": self._family(
+                GaugeMetricFamily, "entity_cache_hit_ratio", "Hits over lookups since start", ("cache",)
+            ),
+        }
+        for name, cache in CACHE_REGISTRY.items():
+            stats = cache.stats()
+            for key, family in families.items():
+                family.add_metric([name, *self._labels.values()], stats[key])
+        yield from families.values()
+
+
+if MULTIPROC_DIR_ENV not in os.environ:
+    REGISTRY.register(_ScrapeTimeCollector())
+
+
+def render_metrics() -> bytes:
+    """The current metrics in the Prometheus text format, summed over workers in multiprocess mode."""
+    if MULTIPROC_DIR_ENV not in os.environ:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_ScrapeTimeCollector(pid=os.getpid()))
+    return generate_latest(registry)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,66 @@
+"""
+Per-request context for logging.
+
+`RequestContextMiddleware` is a pure ASGI middleware, so it adds no task or
+response-streaming overhead the way `BaseHTTPMiddleware` does. For each HTTP
+request it:
+
+* takes the id from `X-Request-ID` if the client sent a usable one, and
+  generates one otherwise;
+* binds the id in a contextvar, so every log record carries it as
+  `request_id`;
+* echoes the id in the `X-Request-ID` response header;
+* buffers the request's log records until the response starts, and then
+  queues them as one batch (see `start_log_batch`).
+"""
+
+import re
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.logger import request_id_var, start_log_batch
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Client ids end up in every log line; anything else is replaced
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+def request_id_from(headers: Headers) -> str:
+    request_id = headers.get(REQUEST_ID_HEADER)
+    if request_id and _VALID_REQUEST_ID.fullmatch(request_id):
+        return request_id
+    return uuid.uuid4().hex
+
+
+class RequestContextMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = request_id_from(Headers(scope=scope))
+        token = request_id_var.set(request_id)
+        batch = start_log_batch()
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).setdefault(REQUEST_ID_HEADER, request_id)
+                # Records logged while streaming the body are written as they come
+                if batch is not None:
+                    batch.close()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if batch is not None:
+                batch.close()
+        # Left bound when the app raises: the 500 handler runs outside this
+        # middleware and its log record and response still carry the id
+        request_id_var.reset(token)
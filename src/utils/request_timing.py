@@ -0,0 +1,168 @@
+"""Per-request database, handler and serialization timings for the `Server-Timing` header and the access log."""
+
+import dataclasses
+import functools
+import inspect
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Coroutine, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.logger import access_logger
+from src.utils.metrics import REQUESTS_IN_FLIGHT, observe_request
+
+
+class RequestTimings:
+    __slots__ = ("db_seconds", "db_queries", "handler_seconds", "serialize_seconds", "handler_finished")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        # None for requests that are not served by a TimedRoute (docs, openapi.json)
+        self.handler_seconds: Optional[float] = None
+        self.serialize_seconds: Optional[float] = None
+        self.handler_finished: Optional[float] = None
+
+    def server_timing(self, total_seconds: float) -> str:
+        metrics = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"']
+        if self.handler_seconds is not None:
+            metrics.append(f"handler;dur={self.handler_seconds * 1000:.2f}")
+        if self.serialize_seconds is not None:
+            metrics.append(f"serialize;dur={self.serialize_seconds * 1000:.2f}")
+        metrics.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def log_fields(self, total_seconds: float) -> dict:
+        return {
+            "duration_ms": _milliseconds(total_seconds),
+            "db_ms": _milliseconds(self.db_seconds),
+            "db_queries": self.db_queries,
+            "handler_ms": _milliseconds(self.handler_seconds),
+            "serialize_ms": _milliseconds(self.serialize_seconds),
+        }
+
+
+def _milliseconds(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+_timings_var: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _timings_var.get()
+
+
+def record_query(seconds: float) -> None:
+    """Add one executed statement to the current request's timings, if any."""
+    timings = _timings_var.get()
+    if timings is not None:
+        timings.db_seconds += seconds
+        timings.db_queries += 1
+
+
+def _record_handler(started: float) -> None:
+    timings = _timings_var.get()
+    if timings is not None:
+        timings.handler_finished = perf_counter()
+        timings.handler_seconds = timings.handler_finished - started
+
+
+def _timed_endpoint(call: Callable[..., Any]) -> Callable[..., Any]:
+    # The wrapper must be a coroutine function exactly when `call` is one:
+    # FastAPI runs plain functions in its threadpool
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def timed(**values: Any) -> Any:
+            started = perf_counter()
+            try:
+                return await call(**values)
+            finally:
+                _record_handler(started)
+    else:
+        @functools.wraps(call)
+        def timed(**values: Any) -> Any:
+            started = perf_counter()
+            try:
+                return call(**values)
+            finally:
+                _record_handler(started)
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that records endpoint and serialization time in the request's timings."""
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original = self.dependant
+        self.dependant = dataclasses.replace(original, call=_timed_endpoint(original.call))
+        try:
+            handler = super().get_route_handler()
+        finally:
+            self.dependant = original
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            timings = _timings_var.get()
+            if timings is not None and timings.handler_finished is not None:
+                # Everything after the endpoint returned: validation, encoding, rendering
+                timings.serialize_seconds = perf_counter() - timings.handler_finished
+            return response
+
+        return timed_handler
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp, expose_header: Optional[bool] = None):
+        self.app = app
+        # Read from settings on the first request when not given
+        self.expose_header = expose_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.expose_header is None:
+            from src.config.config import get_settings
+            self.expose_header = get_settings().server.timing_header
+
+        timings = RequestTimings()
+        token = _timings_var.set(timings)
+        started = perf_counter()
+        # Unhandled exceptions become a 500 outside this middleware
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.expose_header:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", timings.server_timing(perf_counter() - started)
+                    )
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings_var.reset(token)
+            elapsed = perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            observe_request(scope["method"], route, status_code, elapsed)
+            access_logger.info(
+                "%s %s %s %.1fms",
+                scope["method"], scope["path"], status_code, elapsed * 1000,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    **timings.log_fields(elapsed),
+                }
+            )
@@ -0,0 +1,32 @@
+from typing import AsyncIterator, List, Sequence, Type
+
+from pydantic import BaseModel
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+
+EXPORT_MEDIA_TYPES = {"csv": CSV_MEDIA_TYPE, "ndjson": NDJSON_MEDIA_TYPE}
+
+
+def attachment_headers(filename: str) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+async def ndjson_stream(
+    batches: AsyncIterator[Sequence[object]],
+    schema: Type[BaseModel]
+) -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows as newline-delimited JSON.
+
+    Each batch becomes one chunk of the response body, so only a single batch
+    is ever held in memory.
+    """
+    async for batch in batches:
+        lines: List[bytes] = [
+            schema.model_validate(row, from_attributes=True).model_dump_json().encode()
+            for row in batch
+        ]
+        lines.append(b"")
+        yield b"\n".join(lines)
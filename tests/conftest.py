@@ -7,7 +7,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
 from src.main import app
 from src.database.base import Base
-from src.database.postgres_conn import get_async_session
+from src.database.postgres_conn import get_async_session, get_read_async_session, get_read_stream_async_session, instrument_query_timing, read_session_makers
 
 
 load_dotenv(".env.test")
@@ -19,7 +19,9 @@ API_BASE_URL = os.getenv("API_BASE_URL")
 # Test engine and sessionmaker
 # -----------------------------
 engine_test = create_async_engine(TEST_DATABASE_URL, future=True)
+instrument_query_timing(engine_test)
 async_session_test = sessionmaker(engine_test, class_=AsyncSession, expire_on_commit=False)
+read_sessions_test = read_session_makers(engine_test)
 
 # -----------------------------
 # Fixture: DB session per test
@@ -43,12 +45,23 @@ async def override_get_test_session():
         async with session.begin():
             yield session
 
+async def override_get_test_read_session():
+    async with read_sessions_test.autocommit() as session:
+        yield session
+
+async def override_get_test_read_stream_session():
+    async with read_sessions_test.read_only() as session:
+        async with session.begin():
+            yield session
+
 # -----------------------------
 # AsyncClient fixture
 # -----------------------------
 @pytest.fixture
 async def async_client():
     app.dependency_overrides[get_async_session] = override_get_test_session
+    app.dependency_overrides[get_read_async_session] = override_get_test_read_session
+    app.dependency_overrides[get_read_stream_async_session] = override_get_test_read_stream_session
 
     async with AsyncClient(
         transport=ASGITransport(app=app),
@@ -0,0 +1,135 @@
+import pytest
+
+from src.database.cache import EntityCache
+from src.user_profile.models import UserProfile
+from src.user_profile.repository import UserRepository
+from tests.conftest import async_session_test
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestEntityCache:
+
+    def test_lru_eviction(self):
+        cache = EntityCache("test", maxsize=2, ttl=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        assert cache.get(1) == "a"  # 1 is now most recently used
+        cache.set(3, "c")
+        assert cache.get(2) is None
+        assert cache.get(1) == "a"
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry_and_invalidate(self):
+        clock = FakeClock()
+        cache = EntityCache("test", maxsize=10, ttl=5, clock=clock)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        clock.now = 4
+        assert cache.get(1) == "a"
+        cache.invalidate(2)
+        assert cache.get(2) is None
+        clock.now = 6
+        assert cache.get(1) is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+
+
+async def create_user(name):
+    async with async_session_test() as session:
+        async with session.begin():
+            user = UserProfile(name=name, email=f"{name}@example.com", domain="example.com", username=name)
+            session.add(user)
+        return user.id
+
+
+def cached_repository(session, cache):
+    repository = UserRepository(session)
+    repository.cache = cache
+    return repository
+
+
+@pytest.mark.asyncio
+class TestRepositoryCache:
+
+    async def test_hit_returns_private_instance(self):
+        cache = EntityCache("users_test", maxsize=10, ttl=60)
+        user_id = await create_user("cache_hit")
+        async with async_session_test() as session:
+            async with session.begin():
+                loaded = await cached_repository(session, cache).get_by_id(user_id)
+                # Nothing is shared until the transaction commits
+                assert cache.get(user_id) is None
+        assert isinstance(cache.get(user_id), dict)
+
+        async with async_session_test() as first, async_session_test() as second:
+            changed = await cached_repository(first, cache).get_by_id(user_id)
+            changed.name = "changed, not flushed"
+            hit = await cached_repository(second, cache).get_by_id(user_id)
+            assert hit is not changed and hit is not loaded
+            assert hit.name == "cache_hit"
+            await first.rollback()
+
+    async def test_rolled_back_changes_are_not_cached(self):
+        cache = EntityCache("users_test", maxsize=10, ttl=60)
+        user_id = await create_user("cache_rollback")
+        async with async_session_test() as session:
+            repository = cached_repository(session, cache)
+            user = await repository.get_by_id(user_id)
+            user.name = "rolled back"
+            await session.flush()
+            await session.rollback()
+        assert cache.get(user_id) is None
+
+        async with async_session_test() as session:
+            async with session.begin():
+                user = await cached_repository(session, cache).get_by_id(user_id)
+        assert user.name == "cache_rollback"
+        async with async_session_test() as session:
+            assert (await cached_repository(session, cache).get_by_id(user_id)).name == "cache_rollback"
+
+    async def test_update_invalidates_after_commit(self):
+        cache = EntityCache("users_test", maxsize=10, ttl=60)
+        user_id = await create_user("cache_invalidate")
+        async with async_session_test() as session:
+            async with session.begin():
+                await cached_repository(session, cache).get_by_id(user_id)
+        assert cache.get(user_id) is not None
+
+        async with async_session_test() as session:
+            async with session.begin():
+                repository = cached_repository(session, cache)
+                user = await repository.get_by_id(user_id)
+                user.name = "updated"
+                repository.invalidate(user_id)
+        assert cache.get(user_id) is None
+        async with async_session_test() as session:
+            async with session.begin():
+                user = await cached_repository(session, cache).get_by_id(user_id)
+        assert user.name == "updated"
+        assert cache.get(user_id)["name"] == "updated"
+
+    async def test_hit_keeps_unflushed_changes_in_session(self):
+        cache = EntityCache("users_test", maxsize=10, ttl=60)
+        user_id = await create_user("cache_same_session")
+        async with async_session_test() as session:
+            async with session.begin():
+                await cached_repository(session, cache).get_by_id(user_id)
+        assert cache.get(user_id) is not None
+
+        async with async_session_test() as session:
+            repository = cached_repository(session, cache)
+            user = await repository.get_by_id(user_id)
+            user.name = "modified-in-session"
+            again = await repository.get_by_id(user_id)
+            assert again is user
+            assert again.name == "modified-in-session"
+            assert (await repository.get_by(username="cache_same_session")) is user
+            await session.rollback()
@@ -0,0 +1,190 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+from src.utils.hot_logging import HotPathLogger, summarize
+from src.utils.logger import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RequestLogBatch,
+    _QueuePipeline,
+    _log_batch_var,
+    build_handlers,
+    request_id_var,
+)
+
+
+def make_record(message):
+    return logging.LogRecord("fastapi_app.test", logging.INFO, __file__, 1, message, None, None)
+
+
+def test_dropping_queue_handler_never_blocks():
+    log_queue = queue.Queue(maxsize=2)
+    handler = DroppingQueueHandler(log_queue)
+
+    for message in ("first", "second", "third", "fourth"):
+        handler.handle(make_record(message))
+    assert handler.dropped == 2
+    assert [log_queue.get_nowait().getMessage() for _ in range(2)] == ["first", "second"]
+
+    # The next record that fits is preceded by a report of what was lost
+    handler.handle(make_record("fifth"))
+    assert [log_queue.get_nowait().getMessage() for _ in range(2)] == [
+        "Logging queue was full, dropped 2 records",
+        "fifth",
+    ]
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_hot_logger(name, **kwargs):
+    base = logging.getLogger(name)
+    base.setLevel(logging.INFO)
+    base.propagate = False
+    capture = Capture()
+    base.handlers[:] = [capture]
+    return HotPathLogger(base, **kwargs), capture
+
+
+def test_summarize_bounds_large_collections():
+    assert str(summarize(list(range(1000)), max_items=3)) == "<list of 1000: [0, 1, 2, ...]>"
+    assert str(summarize({"a": 1}, max_items=3)) == "<dict of 1: ['a': 1]>"
+    assert str(summarize("x" * 50, max_chars=10)) == "xxxxxxxxxx... (50 chars)"
+
+
+def test_hot_path_logger_samples_per_call_site():
+    hot_logger, capture = make_hot_logger(
+        "fastapi_app.test_sampling",
+        sample_rates={f"{__name__}:sampled_call": 0.25},
+        max_items=2,
+        max_chars=100
+    )
+
+    def sampled_call(i):
+        hot_logger.info("Request %s", i)
+
+    for i in range(8):
+        sampled_call(i)
+        hot_logger.info("Unsampled %s", i)
+
+    sampled = [r for r in capture.records if r.funcName == "sampled_call"]
+    assert [r.getMessage() for r in sampled] == ["Request 0", "Request 4"]
+    assert all(r.sample_rate == 0.25 for r in sampled)
+    assert len(capture.records) == 2 + 8
+
+
+def test_hot_path_logger_is_lazy():
+    hot_logger, capture = make_hot_logger("fastapi_app.test_lazy", sample_rates={}, max_items=2, max_chars=100)
+
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("formatted a disabled record")
+
+    hot_logger.debug("Never formatted %s", Exploding())
+    hot_logger.info("Questions: %s", list(range(10)))
+    assert capture.records[0].getMessage() == "Questions: <list of 10: [0, 1, ...]>"
+
+
+def test_queue_pipeline_stops_with_full_queue():
+    capture = Capture()
+    pipeline = _QueuePipeline([capture], maxsize=1)
+    for i in range(100):
+        pipeline.queue_handler.handle(make_record(f"record {i}"))
+    pipeline.stop()
+    assert len(capture.records) + pipeline.queue_handler.dropped >= 100
+
+
+def test_json_formatter_keeps_extra_fields_and_request_id():
+    record = logging.LogRecord(
+        "fastapi_app", logging.ERROR, __file__, 1, "%s: %s", ("NOT_FOUND", "No user"), None
+    )
+    record.__dict__.update({"error_code": "NOT_FOUND", "details": {"id": 7}, "request_id": "abc"})
+
+    line = json.loads(JsonFormatter().format(record))
+    assert line["message"] == "NOT_FOUND: No user"
+    assert line["level"] == "ERROR"
+    assert line["request_id"] == "abc"
+    assert line["error_code"] == "NOT_FOUND"
+    assert line["details"] == {"id": 7}
+
+
+def test_request_records_are_queued_as_one_batch():
+    log_queue = queue.Queue()
+    handler = DroppingQueueHandler(log_queue)
+    batch = RequestLogBatch(handler, max_records=100)
+    request_token = request_id_var.set("req-1")
+    batch_token = _log_batch_var.set(batch)
+    try:
+        for message in ("first", "second"):
+            handler.handle(make_record(message))
+        assert log_queue.empty()
+        batch.close()
+        # Once closed, records go straight to the queue
+        handler.handle(make_record("after"))
+    finally:
+        _log_batch_var.reset(batch_token)
+        request_id_var.reset(request_token)
+
+    queued = log_queue.get_nowait()
+    assert [r.getMessage() for r in queued] == ["first", "second"]
+    assert all(r.request_id == "req-1" for r in queued)
+    assert log_queue.get_nowait().getMessage() == "after"
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_generated_echoed_and_reported(async_client):
+    response = await async_client.post("/user/list/page", params={"cursor": "not-a-cursor"})
+    request_id = response.headers["X-Request-ID"]
+    assert request_id
+    assert response.json()["request_id"] == request_id
+
+    response = await async_client.post(
+        "/user/list/page", params={"cursor": "not-a-cursor"}, headers={"X-Request-ID": "client-id-1"}
+    )
+    assert response.headers["X-Request-ID"] == "client-id-1"
+    assert response.json()["request_id"] == "client-id-1"
+
+    # Ids that are unsafe to put in log lines are replaced
+    response = await async_client.post(
+        "/user/list/page", params={"cursor": "not-a-cursor"}, headers={"X-Request-ID": "bad id <script>"}
+    )
+    assert response.headers["X-Request-ID"] != "bad id <script>"
+
+
+def test_queued_records_keep_call_time_values():
+    log_queue = queue.Queue()
+    handler = DroppingQueueHandler(log_queue)
+    items = [1, 2]
+    record = logging.LogRecord("fastapi_app", logging.INFO, __file__, 1, "Items: %s", (summarize(items),), None)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record.exc_info = sys.exc_info()
+    handler.handle(record)
+    items.append(3)
+
+    queued = log_queue.get_nowait()
+    assert queued.getMessage() == "Items: <list of 2: [1, 2]>"
+    assert queued.exc_info is None
+    assert "ValueError: boom" in queued.exc_text
+    assert "ValueError: boom" in logging.Formatter().format(queued)
+
+
+def test_handlers_without_files_log_to_stdout_only(tmp_path):
+    log_dir = tmp_path / "logs"
+    handlers = build_handlers(logging.DEBUG, str(log_dir), files=False)
+
+    assert len(handlers) == 1
+    assert handlers[0].stream is sys.stdout
+    assert handlers[0].level == logging.DEBUG
+    assert not log_dir.exists()
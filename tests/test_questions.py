@@ -0,0 +1,312 @@
+import asyncio
+import json
+from collections import Counter
+
+import asyncpg
+import pytest
+from sqlalchemy import func, make_url, select
+
+from src.commands.rebuild_aggregates import rebuild_aggregates
+from src.user_profile.answer_buffer import AnswerWriteBuffer
+from src.user_profile.live_results import MAX_NOTIFY_BYTES, AggregateBroadcaster, decode_deltas, notify_payloads
+from src.user_profile.models import AnswerAggregate, UserAnswer
+from src.user_profile.repository import QuestionRepository
+from src.user_profile.schemas import QuestionRead
+from tests.conftest import TEST_DATABASE_URL, async_session_test
+
+
+def choice_question(text, que_order=1):
+    return {
+        "text": text,
+        "type": "single_choice",
+        "que_order": que_order,
+        "options": [{"text": "Yes"}, {"text": "No"}]
+    }
+
+
+@pytest.mark.asyncio
+class TestQuestionApi:
+
+    async def test_question_list_reflects_new_questions(self,async_client):
+        """
+        Test that the cached catalog is rebuilt after a question is created.
+        """
+        response = await async_client.post("/user/question/list")
+        assert response.status_code == 200
+        before = response.json()
+
+        response = await async_client.post("/user/question/create", json=choice_question("Do you like surveys?"))
+        assert response.status_code == 201
+        created = response.json()
+
+        response = await async_client.post("/user/question/list")
+        assert response.status_code == 200
+        after = response.json()
+        assert len(after) == len(before) + 1
+        assert created in after
+
+    async def test_question_list_etag(self,async_client):
+        """
+        Test that /question/list answers a matching If-None-Match with 304.
+        """
+        response = await async_client.post("/user/question/list")
+        etag = response.headers["etag"]
+
+        response = await async_client.post("/user/question/list", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        await async_client.post("/user/question/create", json=choice_question("Would you recommend us?", 2))
+        response = await async_client.post("/user/question/list", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    async def test_catalog_json_matches_orm(self,async_client,db_session):
+        """
+        Test that the Postgres-built catalog matches the ORM one, ordered by que_order.
+        """
+        await async_client.post("/user/question/create", json=choice_question("Built by Postgres?", 0))
+        await async_client.post("/user/question/create", json={
+            "text": "Rate the database",
+            "type": "matrix_any",
+            "que_order": 0,
+            "matrix_rows": ["Speed"],
+            "matrix_cols": ["Bad", "Good"]
+        })
+        repo = QuestionRepository(db_session)
+        from_database = json.loads(await repo.catalog_json())
+        from_orm = [
+            QuestionRead.model_validate(q, from_attributes=True).model_dump(mode="json")
+            for q in await repo.list_catalog()
+        ]
+
+        assert from_database == from_orm
+        assert [(q["que_order"], q["id"]) for q in from_orm] == sorted((q["que_order"], q["id"]) for q in from_orm)
+
+    async def test_submit_answers(self,async_client):
+        """
+        Test submitting a batch of answers across question types.
+        """
+        choice = (await async_client.post("/user/question/create", json=choice_question("Pick one", 3))).json()
+        matrix = (await async_client.post("/user/question/create", json={
+            "text": "Rate each area",
+            "type": "matrix_one",
+            "que_order": 4,
+            "matrix_rows": ["Speed", "Price"],
+            "matrix_cols": ["Bad", "Good"]
+        })).json()
+        text = (await async_client.post("/user/question/create", json={
+            "text": "Anything else?",
+            "type": "open_text",
+            "que_order": 5
+        })).json()
+
+        answers = [
+            {"question_id": choice["id"], "answer_data": choice["options"][0]["id"]},
+            {"question_id": matrix["id"], "answer_data": {"Speed": "Good", "Price": "Bad"}},
+            {"question_id": text["id"], "answer_data": "Keep it up"}
+        ]
+        response = await async_client.post("/user/question/submit", json={"user_id": 1, "answers": answers})
+        assert response.status_code == 201
+        assert response.json() == {"user_id": 1, "accepted": 3}
+
+        response = await async_client.post(f"/user/question/{choice['id']}/results")
+        assert response.status_code == 200
+        results = response.json()
+        assert results["responses"] == 1
+        assert [option["count"] for option in results["options"]] == [1, 0]
+
+        response = await async_client.post(f"/user/question/{matrix['id']}/results")
+        assert response.json()["matrix"] == {"Speed": {"Bad": 0, "Good": 1}, "Price": {"Bad": 1, "Good": 0}}
+
+    async def test_rebuild_aggregates_matches_incremental_counts(self,async_client,db_session):
+        choice = (await async_client.post("/user/question/create", json=choice_question("Pick for rebuild", 9))).json()
+        matrix = (await async_client.post("/user/question/create", json={
+            "text": "Rate for rebuild", "type": "matrix_any", "que_order": 10,
+            "matrix_rows": ["Speed", "Price"], "matrix_cols": ["Bad", "Good"]
+        })).json()
+        for user_id, option in ((1, 0), (2, 1), (3, 0)):
+            answers = [
+                {"question_id": choice["id"], "answer_data": choice["options"][option]["id"]},
+                {"question_id": matrix["id"], "answer_data": {"Speed": ["Good"], "Price": ["Bad", "Good"]}}
+            ]
+            response = await async_client.post("/user/question/submit", json={"user_id": user_id, "answers": answers})
+            assert response.status_code == 201
+
+        query = select(AnswerAggregate.question_id, AnswerAggregate.bucket, AnswerAggregate.count)
+        incremental = set((await db_session.execute(query)).all())
+        assert incremental
+
+        await rebuild_aggregates(db_session, batch_size=2)
+        rebuilt = set((await db_session.execute(query)).all())
+        assert rebuilt == incremental
+
+    async def test_submit_answers_rejects_invalid(self,async_client):
+        choice = (await async_client.post("/user/question/create", json=choice_question("Pick again", 6))).json()
+        answers = [
+            {"question_id": choice["id"], "answer_data": -1},
+            {"question_id": 999999, "answer_data": "?"}
+        ]
+        response = await async_client.post("/user/question/submit", json={"user_id": 1, "answers": answers})
+        assert response.status_code == 400
+        data = response.json()
+        assert data["error_code"] == "INVALID_ANSWER"
+        assert set(data["details"]["answers"]) == {"0", "1"}
+
+    async def test_submit_answers_rejects_malformed_matrix(self,async_client):
+        matrix_one = (await async_client.post("/user/question/create", json={
+            "text": "Rate once", "type": "matrix_one", "que_order": 7,
+            "matrix_rows": ["r"], "matrix_cols": ["a", "b"]
+        })).json()
+        matrix_any = (await async_client.post("/user/question/create", json={
+            "text": "Rate any", "type": "matrix_any", "que_order": 8,
+            "matrix_rows": ["r"], "matrix_cols": ["a", "b"]
+        })).json()
+        answers = [
+            {"question_id": matrix_one["id"], "answer_data": {"r": ["a"]}},
+            {"question_id": matrix_one["id"], "answer_data": {"r": {"a": 1}}},
+            {"question_id": matrix_any["id"], "answer_data": {"r": [{"a": 1}]}},
+            {"question_id": matrix_any["id"], "answer_data": {"r": [["a"], "b"]}}
+        ]
+        response = await async_client.post("/user/question/submit", json={"user_id": 1, "answers": answers})
+        assert response.status_code == 400
+        data = response.json()
+        assert data["error_code"] == "INVALID_ANSWER"
+        assert set(data["details"]["answers"]) == {"0", "1", "2", "3"}
+
+    async def test_answer_write_buffer_batches_submissions(self,async_client,db_session):
+        """
+        Test that concurrent submissions are flushed together and acknowledged.
+        """
+        question = (await async_client.post("/user/question/create", json={
+            "text": "Buffered question",
+            "type": "open_text",
+            "que_order": 7
+        })).json()
+        buffer = AnswerWriteBuffer(async_session_test, max_batch_rows=100, flush_interval_ms=20)
+        buffer.start()
+        await asyncio.gather(*(
+            buffer.submit(
+                [{"user_id": user_id, "question_id": question["id"], "answer_data": "ok"}],
+                Counter({(question["id"], "responses"): 1})
+            )
+            for user_id in range(10)
+        ))
+        await buffer.stop()
+
+        query = select(func.count()).select_from(UserAnswer).where(UserAnswer.question_id == question["id"])
+        assert (await db_session.execute(query)).scalar() == 10
+
+        response = await async_client.post(f"/user/question/{question['id']}/results")
+        assert response.json()["responses"] == 10
+
+    async def test_results_broadcaster_coalesces_deltas(self):
+        broadcaster = AggregateBroadcaster(interval=0.01)
+        stream = broadcaster.subscribe()
+        assert await stream.__anext__() == "retry: 3000\n\n"
+
+        next_message = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        broadcaster.publish(Counter({(1, "responses"): 1, (1, "option:2"): 1}))
+        broadcaster.publish(Counter({(1, "responses"): 1}))
+        message = await asyncio.wait_for(next_message, 1)
+        assert message == 'event: delta\ndata: {"1":{"responses":2,"option:2":1}}\n\n'
+        await stream.aclose()
+        assert broadcaster.subscriber_count == 0
+
+    async def test_results_fan_out_reaches_other_workers(self):
+        """
+        Two broadcasters stand in for two workers sharing one database.
+        """
+        connect_args = make_url(TEST_DATABASE_URL).translate_connect_args(username="user")
+        ingesting, serving = AggregateBroadcaster(interval=0.01), AggregateBroadcaster(interval=0.01)
+        for broadcaster in (ingesting, serving):
+            broadcaster.start_fan_out(lambda: asyncpg.connect(**connect_args))
+        stream = serving.subscribe()
+        try:
+            while not (ingesting.fanning_out and serving.fanning_out):
+                await asyncio.sleep(0.01)
+            assert await stream.__anext__() == "retry: 3000\n\n"
+
+            ingesting.publish(Counter({(1, "responses"): 1}))
+            message = await asyncio.wait_for(stream.__anext__(), 2)
+            assert message == 'event: delta\ndata: {"1":{"responses":1}}\n\n'
+        finally:
+            await stream.aclose()
+            await ingesting.stop_fan_out()
+            await serving.stop_fan_out()
+
+    async def test_notify_payloads_fit_in_a_notify(self):
+        deltas = Counter({(question_id, f"option:{question_id}"): 1 for question_id in range(2000)})
+        payloads = notify_payloads(deltas)
+        assert len(payloads) > 1
+        assert all(len(payload.encode()) < MAX_NOTIFY_BYTES for payload in payloads)
+        merged = Counter()
+        for payload in payloads:
+            merged.update(decode_deltas(payload))
+        assert merged == deltas
+
+    async def test_import_questions_ndjson(self,async_client):
+        """
+        Test importing questions from NDJSON with one invalid line.
+        """
+        lines = [
+            json.dumps({"text": "Imported choice", "type": "multiple_choice", "que_order": 10,
+                        "options": [{"text": "A"}, {"text": "B"}, {"text": "C"}]}),
+            json.dumps({"text": "Missing options", "type": "single_choice", "que_order": 11}),
+            json.dumps({"text": "Imported text", "type": "open_text", "que_order": 12}),
+        ]
+        response = await async_client.post(
+            "/user/question/import",
+            params={"format": "ndjson"},
+            content="\n".join(lines).encode()
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["failed"] == 1
+        assert data["errors"][0]["line"] == 2
+
+        catalog = (await async_client.post("/user/question/list")).json()
+        imported = next(q for q in catalog if q["text"] == "Imported choice")
+        assert [option["text"] for option in imported["options"]] == ["A", "B", "C"]
+
+    async def test_import_questions_rejects_invalid_utf8(self,async_client):
+        body = json.dumps({"text": "Before bad bytes", "type": "open_text", "que_order": 13}).encode()
+        body += b'\n\xff\xfe{"text": "Bad", "type": "open_text", "que_order": 14}'
+        response = await async_client.post("/user/question/import", params={"format": "ndjson"}, content=body)
+        assert response.status_code == 400
+        data = response.json()
+        assert data["error_code"] == "VALIDATION_ERROR"
+        assert data["details"] == {"line": 2}
+
+        catalog = (await async_client.post("/user/question/list")).json()
+        assert not [q for q in catalog if q["text"] == "Before bad bytes"]
+
+    async def test_import_questions_csv(self,async_client):
+        body = (
+            "text,type,que_order,options,matrix_rows,matrix_cols\n"
+            '"Rate us, please",matrix_any,13,,Speed|Price,Bad|Good\n'
+        )
+        response = await async_client.post("/user/question/import", params={"format": "csv"}, content=body)
+        assert response.json() == {"imported": 1, "failed": 0, "errors": [], "errors_truncated": False}
+
+        catalog = (await async_client.post("/user/question/list")).json()
+        imported = next(q for q in catalog if q["text"] == "Rate us, please")
+        assert imported["matrix_rows"] == ["Speed", "Price"]
+
+    async def test_export_answers_ndjson(self,async_client):
+        question = (await async_client.post("/user/question/create", json=choice_question("Export me", 14))).json()
+        answers = [{"question_id": question["id"], "answer_data": question["options"][1]["id"]}]
+        for user_id in (21, 22):
+            response = await async_client.post("/user/question/submit", json={"user_id": user_id, "answers": answers})
+            assert response.status_code == 201
+
+        response = await async_client.post(
+            "/user/question/answers/export", params={"format": "ndjson", "question_id": question["id"]}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["user_id"] for line in lines) == [21, 22]
+        assert all(line["answer_data"] == question["options"][1]["id"] for line in lines)
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import pytest
+from sqlalchemy import exc, make_url, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.config.config import DatabaseSettings, ServerSettings, settings
+from src.database.pool import InstrumentedAsyncPool, pool_status
+from src.database.postgres_conn import Database, instrument_query_timing
+from src.database.replica import ReplicaRouter
+from src.server import gunicorn_options
+from src.utils.request_timing import RequestTimings, _timings_var
+from tests.conftest import TEST_DATABASE_URL, engine_test
+
+@pytest.mark.asyncio
+class TestSystemApi:
+
+    async def test_database_pool_status(self,async_client):
+        response = await async_client.post("/system/db/pool")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["pool_class"] == "InstrumentedAsyncPool"
+        assert data["size"] == settings.database.pool_size
+        assert data["max_connections"] == settings.database.pool_size + settings.database.max_overflow
+
+    async def test_server_timing_header(self,async_client):
+        response = await async_client.post("/user/list/page")
+        assert response.status_code == 200
+        metrics = {entry.split(";")[0]: entry for entry in response.headers["Server-Timing"].split(", ")}
+        assert set(metrics) == {"db", "handler", "serialize", "total"}
+        assert 'desc="0 queries"' not in metrics["db"]
+
+    async def test_metrics_endpoint(self,async_client):
+        await async_client.post("/user/list/page")
+        await async_client.post("/user/list/page", params={"cursor": "not-a-cursor"})
+        response = await async_client.get("http://localhost:8000/metrics")
+        assert response.status_code == 200
+        body = response.text
+        assert 'http_request_duration_seconds_count{method="POST",route="/api/v1/user/list/page",status="200"}' in body
+        assert 'db_query_duration_seconds_count{operation="UserRepository.list_page"}' in body
+        assert 'app_exceptions_total{error_code="INVALID_CURSOR"}' in body
+        # Every known error code is exported before it first occurs
+        assert 'app_exceptions_total{error_code="FORBIDDEN"} 0.0' in body
+        assert 'db_pool_size{pool="primary"}' in body
+
+    async def test_query_timing_hooks(self):
+        engine = create_async_engine(TEST_DATABASE_URL)
+        instrument_query_timing(engine)
+        timings = RequestTimings()
+        token = _timings_var.set(timings)
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+                await connection.execute(text("SELECT pg_sleep(0.01)"))
+        finally:
+            _timings_var.reset(token)
+            await engine.dispose()
+        assert timings.db_queries == 2
+        assert timings.db_seconds >= 0.01
+
+    async def test_pool_counts_checkouts_and_timeouts(self):
+        engine = create_async_engine(
+            TEST_DATABASE_URL, poolclass=InstrumentedAsyncPool, pool_size=1, max_overflow=0, pool_timeout=0.1
+        )
+        try:
+            async with engine.connect():
+                assert pool_status(engine.pool)["checked_out"] == 1
+                with pytest.raises(exc.TimeoutError):
+                    async with engine.connect():
+                        pass
+            status = pool_status(engine.pool)
+            assert status["checked_out"] == 0
+            assert status["idle"] == 1
+            assert status["checkouts"] == 1
+            assert status["timeouts"] == 1
+        finally:
+            await engine.dispose()
+
+    async def test_replica_router_uses_healthy_replica(self):
+        """
+        A second database that is not in recovery stands in for a replica with no lag.
+        """
+        clock = [0.0]
+        primary = create_async_engine(TEST_DATABASE_URL)
+        router = ReplicaRouter(primary, engine_test, max_lag_seconds=5, check_interval=10, clock=lambda: clock[0])
+        assert await router.engine() is primary  # unknown until the first probe completes
+        await router._probe_task
+        assert await router.engine() is engine_test
+
+        router.max_lag_seconds = -1
+        assert await router.engine() is engine_test  # probe result still cached
+        clock[0] = 11
+        assert await router.engine() is engine_test  # last result served while probing
+        await router._probe_task
+        assert await router.engine() is primary
+
+    async def test_replica_router_falls_back_when_unreachable(self):
+        replica = create_async_engine(TEST_DATABASE_URL.replace(":5432/", ":1/"))
+        try:
+            router = ReplicaRouter(engine_test, replica)
+            assert await router.refresh() is False
+            assert await router.engine() is engine_test
+        finally:
+            await replica.dispose()
+
+    async def test_replica_router_never_waits_for_silent_replica(self):
+        """
+        A replica that accepts connections but never answers must not hold up reads.
+        """
+        connections = []
+
+        async def accept_silently(reader, writer):
+            connections.append(writer)
+
+        server = await asyncio.start_server(accept_silently, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        replica = create_async_engine(make_url(TEST_DATABASE_URL).set(host="127.0.0.1", port=port))
+        router = ReplicaRouter(engine_test, replica, probe_timeout=0.2)
+        try:
+            assert await asyncio.wait_for(router.engine(), 0.05) is engine_test
+            assert await asyncio.wait_for(router._probe_task, 2) is False
+            assert await asyncio.wait_for(router.engine(), 0.05) is engine_test
+        finally:
+            await router.close()
+            for writer in connections:
+                writer.close()
+            server.close()
+            await replica.dispose()
+
+    async def test_database_warm_up_fills_pool(self):
+        url = make_url(TEST_DATABASE_URL)
+        database = Database(DatabaseSettings(
+            host=url.host, port=url.port, user=url.username, password=url.password, database=url.database, pool_size=2
+        ))
+        try:
+            await database.warm_up(5)
+            status = pool_status(database.engine.pool)
+            assert status["idle"] == 2
+            assert status["checked_out"] == 0
+        finally:
+            await database.dispose()
+
+    async def test_gunicorn_options(self):
+        options = gunicorn_options(ServerSettings(workers=0, port=9000, max_requests=0))
+        assert options["workers"] == (os.cpu_count() or 1)
+        assert options["bind"].endswith(":9000")
+        assert options["max_requests_jitter"] == 0
+        assert options["preload_app"] is True
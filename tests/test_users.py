@@ -1,7 +1,12 @@
-
+import asyncio
+import csv
+import io
+import json
 import pytest
-from sqlalchemy import select
+from sqlalchemy import delete, func, select
 from src.user_profile.models import UserProfile
+from src.user_profile.repository import UserRepository
+from tests.conftest import async_session_test
 
 @pytest.mark.asyncio
 class TestUserApi:
@@ -35,4 +40,142 @@ class TestUserApi:
             assert user_data_dict["email"] == user_data["email"]
             assert user_data_dict["name"] == user_data["name"]
             assert "id" in user_data_dict
-        
\ No newline at end of file
+        
+    async def test_list_users_page(self,async_client,db_session):
+        """
+        Test walking the user list with keyset pagination.
+        """
+        for i in range(5):
+            response = await async_client.post(
+            "/user/create",
+            json={
+                "name": f"Page User {i}",
+                "email": f"pageuser{i}@example.com",
+                "domain": "example.com",
+                "username": f"pageuser{i}"
+            })
+            assert response.status_code == 201
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = await async_client.post("/user/list/page", params=params)
+            assert response.status_code == 200
+            data = response.json()
+            assert len(data["items"]) <= 2
+            seen.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        total = (await db_session.execute(select(func.count()).select_from(UserProfile))).scalar()
+        assert len(seen) == len(set(seen)) == total
+
+    async def test_list_users_page_invalid_cursor(self,async_client):
+        response = await async_client.post("/user/list/page", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "INVALID_CURSOR"
+
+    async def test_bulk_create_users(self,async_client,db_session):
+        """
+        Test bulk creating users with one invalid item in the batch.
+        """
+        users = [
+            {
+                "name": f"Bulk User {i}",
+                "email": f"bulkuser{i}@example.com",
+                "domain": "partner.com",
+                "username": f"bulkuser{i}"
+            }
+            for i in range(3)
+        ]
+        users.insert(1, {"name": "No Email", "domain": "partner.com", "username": "noemail"})
+
+        response = await async_client.post("/user/bulk-create", json=users)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 3
+        assert data["failed"] == 1
+        assert [r["index"] for r in data["results"]] == [0, 1, 2, 3]
+        assert data["results"][1]["success"] is False
+        assert "email" in data["results"][1]["errors"]
+        assert data["results"][3]["user"]["email"] == "bulkuser2@example.com"
+
+        query = select(func.count()).select_from(UserProfile).where(UserProfile.domain == "partner.com")
+        assert (await db_session.execute(query)).scalar() == 3
+
+    async def test_stream_users(self,async_client,db_session):
+        """
+        Test streaming the user list as NDJSON.
+        """
+        response = await async_client.post("/user/list/stream")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+
+        total = (await db_session.execute(select(func.count()).select_from(UserProfile))).scalar()
+        assert len(lines) == total
+        assert all(set(line) == {"id", "name", "email"} for line in lines)
+
+    async def test_list_users_etag(self,async_client):
+        """
+        Test conditional requests against /user/list.
+        """
+        response = await async_client.post("/user/list")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = await async_client.post("/user/list", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        await async_client.post(
+        "/user/create",
+        json={"name": "Etag User", "email": "etag@example.com", "domain": "example.com", "username": "etaguser"})
+        response = await async_client.post("/user/list", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    async def test_table_version_counts_write_statements(self):
+        """
+        Test that the users version moves once per committed write statement.
+        """
+        async with async_session_test() as session:
+            async with session.begin():
+                repository = UserRepository(session)
+                before = await repository.table_version()
+                await repository.add_many([
+                    {"name": f"Version {i}", "email": f"version{i}@example.com", "domain": "example.com", "username": f"version{i}"}
+                    for i in range(3)
+                ])
+                assert await repository.table_version() == before + 1
+            await session.execute(delete(UserProfile).where(UserProfile.username.like("version%")))
+            await session.rollback()
+            assert await repository.table_version() == before + 1
+
+    async def test_export_users_csv(self,async_client,db_session):
+        """
+        Test exporting users as CSV through COPY.
+        """
+        response = await async_client.post("/user/export", params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+
+        total = (await db_session.execute(select(func.count()).select_from(UserProfile))).scalar()
+        assert len(rows) == total
+        assert list(rows[0]) == ["id", "name", "email", "domain", "status", "username", "created_at", "updated_at"]
+
+        response = await async_client.post("/user/export", params={"created_from": "2999-01-01T00:00:00Z"})
+        assert response.text.splitlines() == ["id,name,email,domain,status,username,created_at,updated_at"]
+
+    async def test_export_stopped_early_finishes_copy_task(self):
+        """
+        Test that closing a COPY stream early waits for the cancelled COPY.
+        """
+        async with async_session_test() as session:
+            stream = UserRepository(session).copy_query("SELECT generate_series(1, 500000)")
+            assert await stream.__anext__()
+            await stream.aclose()
+            assert not [task for task in asyncio.all_tasks() if task.get_coro().__name__ == "run_copy"]